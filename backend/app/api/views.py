@@ -1,16 +1,22 @@
-import json
 from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.db import SessionLocal
 from app.models.feed import Feed
 from app.models.article import Article, ArticleStatus
 from app.models.user import User
-from app.core import load_llm_config, save_llm_config
-import yaml
+from app.core import load_llm_config, save_llm_config, STARTUP_STATE
+from app.services import tracing
+from app.services.supervisor import supervisor
+from app.services import coordination
+from app.services import breaker
+from app.services.cache import cache
+from app.services.jobs import jobs
+from app.services import replay
+from app.models.replay import Replay
 
 # Pydantic schemas for request/response models
 from pydantic import BaseModel
@@ -19,10 +25,13 @@ from pydantic import BaseModel
 class FeedIn(BaseModel):
     name: str
     url: str
+    # > 0: urgent lane, < 0: backfill lane
+    priority: int = 0
 
 
 class FeedUpdate(BaseModel):
     url: str
+    priority: Optional[int] = None
 
 
 class FetchIn(BaseModel):
@@ -33,6 +42,44 @@ class UserIn(BaseModel):
     username: str
     webhook: str
     interests: List[str]
+    match_threshold: Optional[float] = None
+    coalesce_window: Optional[int] = None
+    coalesce_max_items: Optional[int] = None
+    max_payload_chars: Optional[int] = None
+    early_notify: bool = False
+    progressive_edits: bool = False
+    # articles for higher-priority users are dispatched first
+    priority: int = 0
+
+
+class ReplayIn(BaseModel):
+    # selection (all optional); dates refer to when articles were ingested
+    feed_name: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    status: Optional[str] = None
+    summarize: bool = False
+    dispatch: bool = False
+    # deliver only to these users (default: all recipients)
+    users: Optional[List[str]] = None
+    chunk_size: Optional[int] = None
+    pause: Optional[int] = None
+
+
+class LLMRoute(BaseModel):
+    # defaults to the model name (or route-<n>)
+    name: Optional[str] = None
+    # defaults to the top-level model_name
+    model_name: Optional[str] = None
+    openai_api_base: Optional[str] = None
+    model_temperature: Optional[float] = None
+    model_max_tokens: Optional[int] = None
+    min_input_tokens: Optional[int] = None
+    max_input_tokens: Optional[int] = None
+    timeout: Optional[float] = None
+    cost_per_1k_tokens: Optional[float] = None
+    # name of the environment variable holding this endpoint's API key
+    api_key_env: Optional[str] = None
 
 
 class LLMConfig(BaseModel):
@@ -40,6 +87,19 @@ class LLMConfig(BaseModel):
     model_temperature: float
     model_max_tokens: int
     openai_api_base: Optional[str] = None
+    # optional: several endpoints with size/latency-based routing and failover
+    routes: Optional[List[LLMRoute]] = None
+    hedge_after: Optional[float] = None
+    # stream summaries and notify early_notify users before the summary is complete
+    streaming: Optional[bool] = None
+    # per-route statistics of this process (read-only)
+    stats: Optional[List[dict]] = None
+
+
+class TracingConfig(BaseModel):
+    enabled: bool
+    exporter: str = "memory"
+    profile_threshold: float = 0.0
 
 
 def get_db():
@@ -58,7 +118,7 @@ router = APIRouter()
 def list_feeds(db: Session = Depends(get_db)):
     """List all RSS feeds"""
     feeds = db.query(Feed).all()
-    return [{"name": f.name, "url": f.url} for f in feeds]
+    return [{"name": f.name, "url": f.url, "priority": f.priority} for f in feeds]
 
 
 @router.post("/feeds", response_model=FeedIn, status_code=status.HTTP_201_CREATED)
@@ -66,10 +126,11 @@ def create_feed(feed: FeedIn, db: Session = Depends(get_db)):
     """Add a new feed"""
     if db.query(Feed).filter_by(name=feed.name).first():
         raise HTTPException(status_code=400, detail=f"Feed '{feed.name}' already exists")
-    new = Feed(name=feed.name, url=feed.url)
+    new = Feed(name=feed.name, url=feed.url, priority=feed.priority)
     db.add(new)
     db.commit()
-    return {"name": new.name, "url": new.url}
+    cache.invalidate("feeds")
+    return {"name": new.name, "url": new.url, "priority": new.priority}
 
 
 @router.put("/feeds/{name}", response_model=FeedIn)
@@ -79,8 +140,11 @@ def update_feed(name: str, feed: FeedUpdate, db: Session = Depends(get_db)):
     if not existing:
         raise HTTPException(status_code=404, detail=f"Feed '{name}' not found")
     existing.url = feed.url
+    if feed.priority is not None:
+        existing.priority = feed.priority
     db.commit()
-    return {"name": existing.name, "url": existing.url}
+    cache.invalidate("feeds")
+    return {"name": existing.name, "url": existing.url, "priority": existing.priority}
 
 
 @router.delete("/feeds/{name}", status_code=status.HTTP_204_NO_CONTENT)
@@ -88,16 +152,21 @@ def delete_feed(name: str, db: Session = Depends(get_db)):
     """Delete a feed by name"""
     deleted = db.query(Feed).filter_by(name=name).delete()
     db.commit()
+    cache.invalidate("feeds")
     if not deleted:
         raise HTTPException(status_code=404, detail=f"Feed '{name}' not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+def _user_out(u: User) -> dict:
+    return {field: getattr(u, field) for field in UserIn.model_fields}
+
+
 @router.get("/users", response_model=List[UserIn])
 def list_users(db: Session = Depends(get_db)):
     """List all registered users"""
     users = db.query(User).all()
-    return [{"username": u.username, "webhook": u.webhook, "interests": u.interests} for u in users]
+    return [_user_out(u) for u in users]
 
 
 @router.post("/users", response_model=UserIn, status_code=status.HTTP_201_CREATED)
@@ -105,10 +174,11 @@ def create_user(user: UserIn, db: Session = Depends(get_db)):
     """Register a new user webhook and interests"""
     if db.query(User).filter_by(username=user.username).first():
         raise HTTPException(status_code=400, detail=f"User '{user.username}' already exists")
-    new = User(username=user.username, webhook=user.webhook, interests=user.interests)
+    new = User(**user.model_dump())
     db.add(new)
     db.commit()
-    return {"username": new.username, "webhook": new.webhook, "interests": new.interests}
+    cache.invalidate("users")
+    return _user_out(new)
 
 
 @router.delete("/users/{username}", status_code=status.HTTP_204_NO_CONTENT)
@@ -116,20 +186,36 @@ def delete_user(username: str, db: Session = Depends(get_db)):
     """Delete a user by username"""
     deleted = db.query(User).filter_by(username=username).delete()
     db.commit()
+    cache.invalidate("users")
     if not deleted:
         raise HTTPException(status_code=404, detail=f"User '{username}' not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+# length of ai_summary returned by GET /articles?brief=true
+BRIEF_CHARS = 300
+
+
 @router.get("/articles")
 def get_articles(
+    response: Response,
     since: Optional[datetime] = None,
     status: Optional[str] = None,
+    feed: Optional[str] = None,
+    q: Optional[str] = None,
     limit: Optional[int] = None,
+    offset: int = 0,
+    brief: bool = False,
+    count: bool = False,
     db: Session = Depends(get_db),
 ):
-    """List stored articles with optional filtering"""
-    query = db.query(Article)
+    """
+    List stored articles with optional filtering, newest first. Use
+    limit/offset to page; brief=true omits the feed summary and shortens the
+    AI summary; count=true returns the total number of matches in X-Total-Count.
+    """
+    # bodies come from article_bodies in one extra query per page
+    query = db.query(Article).options(selectinload(Article.body))
     if status:
         try:
             statuses = [ArticleStatus[s.strip()] for s in status.split(",")]
@@ -138,21 +224,30 @@ def get_articles(
         query = query.filter(Article.status.in_(statuses))
     if since:
         query = query.filter(Article.updated_at >= since)
+    if feed:
+        query = query.filter(Article.feed_name == feed)
+    if q:
+        query = query.filter(Article.title.ilike(f"%{q}%"))
+    if count:
+        response.headers["X-Total-Count"] = str(query.order_by(None).count())
     query = query.order_by(Article.updated_at.desc())
+    if offset:
+        query = query.offset(offset)
     if limit:
         query = query.limit(limit)
     results = query.all()
     return [
         {
-            "id": art.link,
+            "id": art.id,
             "feed_name": art.feed_name,
             "entry_id": art.entry_id,
             "title": art.title,
             "link": art.link,
             "published": art.published.isoformat() if art.published else None,
-            "summary": art.summary,
-            "ai_summary": art.ai_summary,
-            "recipients": json.loads(art.recipients) if art.recipients else [],
+            "summary": None if brief else art.summary,
+            "ai_summary": (art.ai_summary or "")[:BRIEF_CHARS] if brief else art.ai_summary,
+            "recipients": art.recipients or [],
+            "cluster_id": art.cluster_id,
             "sent": art.sent,
             "status": art.status.value,
             "created_at": art.created_at.isoformat(),
@@ -162,28 +257,95 @@ def get_articles(
     ]
 
 
-@router.post("/fetch", status_code=status.HTTP_204_NO_CONTENT)
+@router.post("/fetch", status_code=status.HTTP_202_ACCEPTED)
 def trigger_fetch(fetch_in: Optional[FetchIn] = None, db: Session = Depends(get_db)):
-    """Trigger immediate fetch and summarization for all or specified feeds"""
-    from ..core import fetch_and_store, summarize_and_push
+    """Enqueue an immediate fetch and summarization for all or specified feeds; returns the job"""
+    from ..core import fetch_job
 
     feeds = db.query(Feed).all()
     selected = feeds
     if fetch_in and fetch_in.feeds:
         selected = [f for f in feeds if f.name in fetch_in.feeds]
-    for f in selected:
-        fetch_and_store(db, {"name": f.name, "url": f.url})
-    summarize_and_push(db)
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    targets = [{"name": f.name, "url": f.url} for f in selected]
+    job = jobs.submit("fetch", lambda: fetch_job(targets), {"feeds": sorted(f["name"] for f in targets)})
+    return job.to_dict()
 
 
-@router.post("/dispatch", status_code=status.HTTP_204_NO_CONTENT)
-def trigger_dispatch(db: Session = Depends(get_db)):
-    """Trigger immediate dispatch of any pending summarized articles"""
-    from ..core import dispatch_pending
+@router.post("/dispatch", status_code=status.HTTP_202_ACCEPTED)
+def trigger_dispatch():
+    """Enqueue immediate dispatch of any pending summarized articles; returns the job"""
+    from ..core import dispatch_job
+
+    return jobs.submit("dispatch", dispatch_job).to_dict()
+
+
+@router.get("/batches")
+def list_batches(limit: int = 20, db: Session = Depends(get_db)) -> List[dict]:
+    """Recent offline summarization batches, newest first"""
+    from app.services import batch
+
+    return batch.recent_batches(db, limit)
+
+
+@router.post("/replays", status_code=status.HTTP_202_ACCEPTED)
+def create_replay(replay_in: ReplayIn, db: Session = Depends(get_db)) -> dict:
+    """Start a throttled re-run of summarization and/or dispatch over the selected articles"""
+    try:
+        new = replay.create(db, **replay_in.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**replay.to_dict(new), "job": replay.start(new.id)}
+
+
+@router.get("/replays")
+def list_replays(limit: int = 20, db: Session = Depends(get_db)) -> List[dict]:
+    """Recent replays with their progress, newest first"""
+    return [replay.to_dict(r) for r in db.query(Replay).order_by(Replay.id.desc()).limit(limit)]
+
+
+def _get_replay(db: Session, replay_id: int) -> Replay:
+    found = db.get(Replay, replay_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Replay not found")
+    return found
+
+
+@router.get("/replays/{replay_id}")
+def get_replay(replay_id: int, db: Session = Depends(get_db)) -> dict:
+    """Progress of one replay"""
+    return replay.to_dict(_get_replay(db, replay_id))
+
+
+@router.post("/replays/{replay_id}/{action}")
+def control_replay(replay_id: int, action: str, db: Session = Depends(get_db)) -> dict:
+    """Pause, resume or cancel a replay (resume also restarts a failed one)"""
+    found = _get_replay(db, replay_id)
+    states = {"pause": replay.PAUSED, "resume": replay.RUNNING, "cancel": replay.CANCELLED}
+    if action not in states:
+        raise HTTPException(status_code=404, detail=f"Unknown action '{action}'")
+    try:
+        replay.set_state(db, found, states[action])
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    out = replay.to_dict(found)
+    if action == "resume":
+        out["job"] = replay.start(found.id)
+    return out
 
-    dispatch_pending(db)
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/jobs")
+def list_jobs(limit: int = 20) -> List[dict]:
+    """Recent on-demand jobs, newest first"""
+    return jobs.list(limit)
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str) -> dict:
+    """State and progress of an on-demand job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 
 @router.get("/health")
@@ -192,26 +354,109 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@router.get("/health/live")
+def liveness(response: Response) -> dict:
+    """Liveness probe: the process is up and serving requests (503 once startup gave up)"""
+    if STARTUP_STATE["fatal"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "failed", "error": STARTUP_STATE["error"]}
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+def readiness(response: Response) -> dict:
+    """Readiness probe: 503 until the database is initialized and seeded; includes startup progress"""
+    if not STARTUP_STATE["db_ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if STARTUP_STATE["db_ready"] else "starting", **STARTUP_STATE}
+
+
+@router.get("/health/endpoints")
+def endpoint_health(degraded: bool = False, kind: Optional[str] = None) -> List[dict]:
+    """Circuit-breaker state and health score per feed / webhook host, worst first"""
+    return breaker.endpoints(degraded_only=degraded, kind=kind)
+
+
+@router.post("/health/endpoints/{key:path}/reset", status_code=status.HTTP_204_NO_CONTENT)
+def reset_endpoint(key: str):
+    """Close an endpoint's circuit breaker so it is retried on the next run"""
+    if not breaker.reset(key):
+        raise HTTPException(status_code=404, detail="Endpoint not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/tasks")
+def list_tasks() -> dict:
+    """State of the supervised background loops (restarts, last error)"""
+    return supervisor.status()
+
+
+@router.get("/cluster")
+def cluster_status() -> dict:
+    """Cluster membership: this worker, leadership and live workers"""
+    return coordination.cluster_status()
+
+
 @router.get("/llm-config", response_model=LLMConfig)
 def get_llm_config():
-    """Retrieve the current LLM configuration from YAML config"""
+    """Retrieve the current LLM configuration from YAML config, with per-route stats"""
+    from app.services import llm_router
+
     cfg = load_llm_config()
     return LLMConfig(
         model_name=cfg.get("model_name", ""),
         model_temperature=cfg.get("model_temperature", 0.0),
         model_max_tokens=cfg.get("model_max_tokens", 0),
         openai_api_base=cfg.get("openai_api_base", ""),
+        # with the default names the router uses, so stats line up
+        routes=llm_router.routes(cfg) if cfg.get("routes") else None,
+        hedge_after=cfg.get("hedge_after"),
+        streaming=cfg.get("streaming"),
+        stats=llm_router.stats(),
     )
 
 
 @router.put("/llm-config", response_model=LLMConfig)
 def set_llm_config(config: LLMConfig):
-    """Update the LLM configuration YAML file"""
-    cfg = {
+    """Update the LLM configuration YAML file (keys not sent are kept)"""
+    cfg = load_llm_config()
+    cfg.update({
         "model_name": config.model_name,
         "model_temperature": config.model_temperature,
         "model_max_tokens": config.model_max_tokens,
         "openai_api_base": config.openai_api_base or "",
-    }
+    })
+    if config.routes is not None:
+        cfg["routes"] = [r.model_dump(exclude_none=True) for r in config.routes]
+    if config.hedge_after is not None:
+        cfg["hedge_after"] = config.hedge_after
+    if config.streaming is not None:
+        cfg["streaming"] = config.streaming
     save_llm_config(cfg)
-    return config
\ No newline at end of file
+    return get_llm_config()
+
+
+@router.get("/tracing", response_model=TracingConfig)
+def get_tracing():
+    """Retrieve the current tracing and profiler settings"""
+    return TracingConfig(**tracing.get_settings())
+
+
+@router.put("/tracing", response_model=TracingConfig)
+def set_tracing(config: TracingConfig):
+    """Enable/disable tracing, pick an exporter and set the slow-job profile threshold"""
+    try:
+        settings = tracing.configure(
+            enabled=config.enabled,
+            exporter=config.exporter,
+            profile_threshold=config.profile_threshold,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return TracingConfig(**settings)
+
+
+@router.get("/tracing/spans")
+def get_spans(limit: int = 200, name: Optional[str] = None):
+    """List recently recorded spans, newest first, optionally filtered by name prefix"""
+    return tracing.recent_spans(limit=limit, name=name)
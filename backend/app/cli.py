@@ -0,0 +1,152 @@
+"""
+Command-line entry point to run the backend roles as separate processes.
+
+    python -m app.cli api                      # FastAPI only (no background loops)
+    python -m app.cli poller --concurrency 8   # fetch feeds
+    python -m app.cli summarizer --concurrency 2
+    python -m app.cli dispatcher
+    python -m app.cli scheduler                # plugins (daily summary, retention)
+    python -m app.cli poller summarizer        # several roles in one process
+    python -m app.cli all                      # API + every loop (same as `uvicorn main:app`)
+    python -m app.cli replay --feed hn --since 2024-05-01 --summarize
+    python -m app.cli replay --resume 3        # continue an interrupted replay
+    python -m app.cli replay --list
+
+All roles share the code in app.core. Run more than one process per role
+with CLUSTER_ENABLED=true so feeds and articles are not processed twice.
+"""
+import os
+import sys
+import signal
+import asyncio
+import logging
+import argparse
+
+from app import core
+from app.services.supervisor import supervisor, SHUTDOWN_TIMEOUT
+from app.services import coordination, replay
+
+CONCURRENCY_SETTINGS = {
+    "poller": "POLL_CONCURRENCY",
+    "summarizer": "SUMMARIZE_CONCURRENCY",
+    "dispatcher": "DISPATCH_CONCURRENCY",
+}
+
+
+async def run_workers(roles) -> None:
+    """Run the background loops of `roles` until SIGINT/SIGTERM, then drain them."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    startup = asyncio.create_task(core.startup_tasks(roles))
+    # exit (non-zero, see main) when startup gives up, so the container is restarted
+    startup.add_done_callback(lambda _: core.STARTUP_STATE["fatal"] and stop.set())
+    await stop.wait()
+    logging.info(f"Stopping roles {', '.join(roles)}")
+    startup.cancel()
+    await supervisor.shutdown(SHUTDOWN_TIMEOUT)
+    replay.runner.shutdown()
+    await asyncio.to_thread(coordination.deregister)
+
+
+def run_api(roles) -> None:
+    """Serve the FastAPI app; `roles` are the loops run inside the API process."""
+    import uvicorn
+
+    os.environ["BACKGROUND_ROLES"] = ",".join(roles) or "none"
+    core.BACKGROUND_ROLES = os.environ["BACKGROUND_ROLES"]
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", 8000)),
+        log_level=os.getenv("LOG_LEVEL", "info").lower(),
+    )
+
+
+def run_replay(argv) -> None:
+    """Create (or resume) a replay and run it in the foreground."""
+    from datetime import datetime
+
+    from app.db import SessionLocal, init_db
+    from app.models.replay import Replay
+
+    parser = argparse.ArgumentParser(prog="python -m app.cli replay", description="Re-run summarization and/or dispatch over selected articles.")
+    parser.add_argument("--feed", help="only articles of this feed")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="ingested at or after (ISO date/time)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="ingested before (ISO date/time)")
+    parser.add_argument("--status", choices=["new", "summarized", "sent"])
+    parser.add_argument("--summarize", action="store_true", help="re-run summarization")
+    parser.add_argument("--dispatch", action="store_true", help="re-deliver to the recipients")
+    parser.add_argument("--user", action="append", dest="users", help="deliver to this user (repeatable); without --summarize every selected article is sent to them")
+    parser.add_argument("--chunk", type=int, default=None, help="articles per chunk (REPLAY_CHUNK)")
+    parser.add_argument("--pause", type=int, default=None, help="seconds between chunks (REPLAY_PAUSE)")
+    parser.add_argument("--resume", type=int, metavar="ID", help="continue replay ID")
+    parser.add_argument("--list", action="store_true", help="list replays and exit")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+    init_db()
+    session = SessionLocal()
+    try:
+        if args.list:
+            for r in session.query(Replay).order_by(Replay.id.desc()).limit(20):
+                print(f"{r.id:>5}  {r.state:<10} {r.processed}/{r.total} processed, {r.failed} failed  "
+                      f"feed={r.feed_name or '*'} summarize={r.summarize} dispatch={r.dispatch}")
+            return
+        if args.resume is not None:
+            target = session.get(Replay, args.resume)
+            if target is None:
+                parser.error(f"replay {args.resume} not found")
+            target.state = replay.RUNNING
+            session.commit()
+            replay_id = target.id
+        else:
+            try:
+                replay_id = replay.create(
+                    session, args.feed, args.since, args.until, args.status,
+                    args.summarize, args.dispatch, args.users, args.chunk, args.pause,
+                ).id
+            except ValueError as e:
+                parser.error(str(e))
+    finally:
+        session.close()
+    try:
+        replay.run(replay_id)
+    except KeyboardInterrupt:
+        print(f"Interrupted; continue with: python -m app.cli replay --resume {replay_id}")
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["replay"]:
+        return run_replay(argv[1:])
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("roles", nargs="+", choices=["api", "all", *core.ROLES])
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="threads per role for poller/summarizer/dispatcher (overrides *_CONCURRENCY)",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
+    roles = list(core.ROLES) if "all" in args.roles else [r for r in args.roles if r != "api"]
+    if args.concurrency is not None:
+        for role in roles:
+            if role in CONCURRENCY_SETTINGS:
+                setattr(core, CONCURRENCY_SETTINGS[role], args.concurrency)
+
+    if "api" in args.roles or "all" in args.roles:
+        run_api(roles)
+    elif roles:
+        asyncio.run(run_workers(roles))
+        if core.STARTUP_STATE["fatal"]:
+            return 1
+    else:
+        parser.error("no roles to run")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,19 +4,33 @@ import asyncio
 import importlib
 import threading
 import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
-import feedparser
 import yaml
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.db import SessionLocal
 from app.models.article import Article, ArticleStatus
-import json
 import requests
-from app.services.summarize import summarize_article
+from app.services.summarize import summarize_article, summarize_article_stream, article_input
+from app.services.tracing import span, profile_job
+from app.services.content import clean_content, prepare_article
+from app.services.payload import chunk_message, post_chunks, edit_message
+from app.services import dedup
+from app.services import batch
+from app.services import streaming
+from app.services import priority
+from app.services import replay
+from app.services.retention import archived_entries
+from app.services.supervisor import supervisor, stopping
+from app.services import coordination
+from app.services import breaker
+from app.services.cache import cache
+from app.services.jobs import report, advance
 # from app.services.dispatcher import dispatch_summary 
 from app.models.feed import Feed
 from app.models.user import User
@@ -26,39 +40,98 @@ BASE_DIR = os.path.dirname(__file__)
 USERS_CONFIG_PATH = os.path.join(BASE_DIR, "config", "users.yml")
 
 def load_users():
-    """Loads users from the database"""
+    """Loads users from the database (cached for CACHE_TTL seconds)"""
+    return cache.get("users", _query_users)
+
+def _query_users():
     session = SessionLocal()
     try:
         return session.query(User).all()
     finally:
         session.close()
 
+def get_user(username: str):
+    """Look up a user by name from the cached user list."""
+    by_name = cache.get(("users", "by_name"), lambda: {u.username: u for u in load_users()})
+    return by_name.get(username)
+
+def _load_yaml(path: str) -> dict:
+    """Read a YAML file, cached until it changes on disk (or CACHE_TTL passes)."""
+    key = ("yaml", path, os.path.getmtime(path))
+    return cache.get(key, lambda: _read_yaml(path))
+
+def _read_yaml(path: str) -> dict:
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
 
 CONFIG_PATH = os.path.join(BASE_DIR, "config", "feeds.yml")
+# progress of the background startup task, reported by /api/health/ready
+STARTUP_STATE = {
+    "phase": "starting",
+    "db_ready": False,
+    "feeds_total": 0,
+    "feeds_done": 0,
+    "error": None,
+    # startup gave up (STARTUP_MAX_ATTEMPTS); liveness then fails so the process is restarted
+    "fatal": False,
+}
+# database init / seeding is retried with exponential backoff up to this delay (seconds)
+STARTUP_RETRY_MAX_DELAY = float(os.getenv("STARTUP_RETRY_MAX_DELAY", 60))
+# give up after this many attempts (0: keep retrying)
+STARTUP_MAX_ATTEMPTS = int(os.getenv("STARTUP_MAX_ATTEMPTS", 0))
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", 300))
+# timeout (seconds) for downloading a single feed
+FEED_TIMEOUT = int(os.getenv("FEED_TIMEOUT", 30))
 
 SUMMARIZE_INTERVAL = int(os.getenv("SUMMARIZE_INTERVAL", POLL_INTERVAL))
 
+# per-role concurrency (threads, each with its own DB session)
+POLL_CONCURRENCY = int(os.getenv("POLL_CONCURRENCY", 1))
+SUMMARIZE_CONCURRENCY = int(os.getenv("SUMMARIZE_CONCURRENCY", 1))
+DISPATCH_CONCURRENCY = int(os.getenv("DISPATCH_CONCURRENCY", 1))
+
+# background roles a process runs; the API process runs all of them unless
+# BACKGROUND_ROLES says otherwise (e.g. "none" when workers run separately)
+ROLES = ("poller", "summarizer", "dispatcher", "scheduler")
+
+
+def parse_roles(value: str) -> list:
+    """Parse a comma-separated role list; 'all' and 'none' are accepted."""
+    value = (value or "").strip().lower()
+    if value in ("", "all"):
+        return list(ROLES)
+    if value == "none":
+        return []
+    roles = [r.strip() for r in value.split(",") if r.strip()]
+    unknown = set(roles) - set(ROLES)
+    if unknown:
+        raise ValueError(f"Unknown roles: {', '.join(sorted(unknown))}")
+    return roles
+
+
+BACKGROUND_ROLES = os.getenv("BACKGROUND_ROLES", "all")
+
 # LLM configuration file path for model parameters
 LLM_CONFIG_PATH = os.path.join(BASE_DIR, "config", "llm.yml")
 
 def load_config():
     """Loads polling interval and feed list from DB"""
-    with open(CONFIG_PATH) as f:
-        cfg = yaml.safe_load(f) or {}
+    cfg = _load_yaml(CONFIG_PATH)
     interval = cfg.get("interval", POLL_INTERVAL)
+    return [dict(f) for f in cache.get("feeds", _query_feeds)], int(interval)
+
+def _query_feeds():
     session = SessionLocal()
     try:
-        feeds = [{"name": f.name, "url": f.url} for f in session.query(Feed).all()]
+        return [{"name": f.name, "url": f.url, "priority": f.priority or 0} for f in session.query(Feed).all()]
     finally:
         session.close()
-    return feeds, int(interval)
 
 def load_llm_config() -> dict:
     """Load LLM model parameters from YAML config."""
     try:
-        with open(LLM_CONFIG_PATH) as f:
-            return yaml.safe_load(f) or {}
+        return dict(_load_yaml(LLM_CONFIG_PATH))
     except FileNotFoundError:
         return {}
 
@@ -66,116 +139,479 @@ def save_llm_config(cfg: dict) -> None:
     """Save LLM model parameters to YAML config."""
     with open(LLM_CONFIG_PATH, "w") as f:
         yaml.safe_dump(cfg, f)
+    cache.invalidate("yaml")
 
 def fetch_and_store(session: Session, feed: dict):
     """Fetch articles from a feed and store them in the database."""
+    key = breaker.feed_key(feed["name"])
+    if not breaker.allow(key):
+        logging.info(f"Skipping feed {feed['name']}: circuit open")
+        return
     logging.info(f"Fetching articles from feed: {feed['name']} ({feed['url']})")
-    parsed = feedparser.parse(feed["url"])
-    for entry in parsed.entries:
-        entry_id = entry.get("id") or entry.get("link")
-        if session.query(Article).filter_by(feed_name=feed["name"], entry_id=entry_id).first():
-            continue
-        published = None
-        if entry.get("published_parsed"):
-            published = datetime(*entry.published_parsed[:6])
-        article = Article(
-            feed_name=feed["name"],
-            entry_id=entry_id,
-            title=entry.get("title"),
-            link=entry.get("link"),
-            published=published,
-            summary=entry.get("summary"),
-            status=ArticleStatus.new,
-        )
-        session.add(article)
+    with span("feed.fetch", feed=feed["name"], url=feed["url"]) as sp:
         try:
-            session.commit()
-        except IntegrityError:
-            session.rollback()
+            resp = requests.get(feed["url"], timeout=FEED_TIMEOUT)
+            sp.set_attribute("status_code", resp.status_code)
+            sp.set_attribute("bytes", len(resp.content))
+            resp.raise_for_status()
         except Exception as e:
-            logging.error(f"Error storing article {entry_id} from feed {feed['name']}: {e}")
-            session.rollback()
+            logging.error(f"Error fetching feed {feed['name']}: {e}")
+            breaker.record_failure(key, str(e))
+            return
+    breaker.record_success(key)
+    import feedparser  # imported lazily to keep API startup fast
+
+    with span("feed.parse", feed=feed["name"]) as sp:
+        parsed = feedparser.parse(resp.content, response_headers=dict(resp.headers))
+        sp.set_attribute("entries", len(parsed.entries))
+    with span("db.store", feed=feed["name"]) as sp:
+        stored = 0
+        archived = archived_entries(
+            session, feed["name"], [entry.get("id") or entry.get("link") for entry in parsed.entries]
+        )
+        for entry in parsed.entries:
+            entry_id = entry.get("id") or entry.get("link")
+            if entry_id in archived:
+                continue
+            if session.query(Article).filter_by(feed_name=feed["name"], entry_id=entry_id).first():
+                continue
+            published = None
+            if entry.get("published_parsed"):
+                published = datetime(*entry.published_parsed[:6])
+            article = Article(
+                feed_name=feed["name"],
+                entry_id=entry_id,
+                title=entry.get("title"),
+                link=entry.get("link"),
+                published=published,
+                summary=entry.get("summary"),
+                clean_summary=clean_content(entry.get("summary")),
+                status=ArticleStatus.new,
+            )
+            session.add(article)
+            try:
+                session.commit()
+                stored += 1
+            except IntegrityError:
+                session.rollback()
+            except Exception as e:
+                logging.error(f"Error storing article {entry_id} from feed {feed['name']}: {e}")
+                session.rollback()
+        sp.set_attribute("stored", stored)
+
+def _claim_new(session: Session, exclude: set) -> list:
+    criteria = [Article.status == ArticleStatus.new, Article.batch_id.is_(None)]
+    if exclude:
+        criteria.append(Article.id.notin_(exclude))
+    with span("db.query", query="new_articles") as sp:
+        # freshest first, so a limited cluster claim does not fill up with backfill
+        articles = coordination.claim_articles(session, *criteria, order_by=Article.published.desc().nullslast())
+        sp.set_attribute("rows", len(articles))
+    return articles
 
 def summarize_and_push(session: Session):
     logging.info(f"Summarizing new articles and preparing for dispatch")
-    new_articles = session.query(Article).filter_by(status=ArticleStatus.new).all()
+    batch.poll_batches(session)
     users = load_users()
     user_data = [{"username": u.username, "interests": u.interests or []} for u in users]
-    offset = 1
-    for i in range(0, len(new_articles), offset):
-        batch = new_articles[i:i+offset]
-        
-        for art in batch:
-            try:
-                inp = (art.title, art.link,
-                    art.published.isoformat() if art.published else "",
-                    art.summary or "")
-                summaries = summarize_article(inp, user_data)
-                art.ai_summary = summaries.get("Summary_of_article", '')
-                art.recipients = json.dumps(summaries.get("Recommend_recipients", []))
-                art.status = ArticleStatus.summarized
-                art.sent = False
-                session.commit()
-    
-            except Exception:
-                # If summarization fails, leave articles as 'new' so they'll be retried later
-                session.rollback()
+    feed_priority = _feed_priorities()
+    # articles already handed to _summarize_one this run (failures stay 'new')
+    attempted = set()
+    # a large backlog of older articles goes to the offline batch API; if the
+    # submission fails they stay 'new' and are claimed below for the live path
+    backlog = batch.claim_backlog(session)
+    if backlog:
+        backlog = [a for a in backlog if not (dedup.DEDUP_ENABLED and _absorb_duplicate(session, a))]
+        if backlog:
+            batch.submit(session, backlog, user_data)
+    new_articles = _claim_new(session, attempted)
+    while new_articles and not stopping():
+        # work in slices and re-query in between, so urgent articles that arrive
+        # during a long run are scheduled ahead of the remaining backfill
+        ordered = priority.schedule(new_articles, lambda a: feed_priority.get(a.feed_name, 0))
+        part = priority.next_slice(ordered)
+        attempted.update(a.id for a in part)
+        matcher, mode = _build_matcher(session, part)
+
+        def handle(sess: Session, art: Article) -> None:
+            if dedup.DEDUP_ENABLED and _absorb_duplicate(sess, art):
+                return
+            _summarize_one(sess, art, user_data, matcher, mode)
+
+        _process_articles(session, part, handle, SUMMARIZE_CONCURRENCY)
+        if len(part) == len(ordered):
+            break
+        new_articles = _claim_new(session, attempted)
+    if dedup.DEDUP_ENABLED:
+        index = dedup.get_index()
+        index.expire()
+        index.save()
+
+def _build_matcher(session: Session, articles: list):
+    """
+    (matcher, mode) for embedding-based recipient selection of `articles`,
+    embedding them first; matcher is None when the mode is off or unavailable.
+    """
+    from app.services import embeddings  # numpy/openai load only when summarizing
+
+    mode = embeddings.embeddings_mode()
+    if mode not in ("prefilter", "replace") or not articles:
+        return None, mode
+    try:
+        matcher = embeddings.build_matcher(session)
+        embeddings.embed_articles(session, articles)
+        return matcher, mode
+    except Exception as e:
+        logging.error(f"Embedding-based matching unavailable, falling back to LLM selection: {e}")
+        session.rollback()
+        return None, mode
+
+def _summarize_one(session: Session, art: Article, user_data: list, matcher=None, mode: str = "off", live: bool = True) -> bool:
+    """
+    Summarize one article and pick its recipients. Returns False if it stays
+    'new'. With live=False (replays) there are no early notifications and an
+    already summarized or sent article keeps its status, so it is not queued
+    for delivery again.
+    """
+    try:
+        candidates = user_data
+        matches = matcher.match(art.embedding, art.embedding_model) if matcher is not None else None
+        if matches is None:
+            # no usable vector (embeddings off or failed, or another model's): the LLM picks from everyone
+            matcher = None
+        else:
+            matched = [name for name, _ in matches]
+            candidates = [u for u in user_data if u["username"] in matched]
+        inp = article_input(art)
+        notifier = None
+        if live and streaming.streaming_enabled():
+            notifier = _early_notifier(art, candidates)
+            with span("llm.summarize", link=art.link, feed=art.feed_name, streaming=True):
+                summaries = summarize_article_stream(inp, candidates, notifier)
+            art.notified = notifier.notified or None
+        else:
+            with span("llm.summarize", link=art.link, feed=art.feed_name):
+                summaries = summarize_article(inp, candidates)
+        art.ai_summary = summaries.get("Summary_of_article", '')
+        recipients = summaries.get("Recommend_recipients", [])
+        if matcher is not None:
+            allowed = {u["username"] for u in candidates}
+            recipients = sorted(allowed) if mode == "replace" else [r for r in recipients if r in allowed]
+        art.recipients = recipients
+        if live or art.status == ArticleStatus.new:
+            art.status = ArticleStatus.summarized
+            art.sent = False
+            art.summarized_at = datetime.now(timezone.utc)
+        if notifier is None or not notifier.notified:
+            # otherwise keep the claim until the immediate delivery below releases it
+            coordination.release(art)
+        session.commit()
+        if dedup.DEDUP_ENABLED:
+            dedup.index_article(art)
+        if notifier is not None and notifier.notified:
+            # follow the early notification with the summary now, not at the next dispatch run
+            _dispatch_one(session, art, only=set(notifier.notified))
+        return True
+    except Exception:
+        # If summarization fails, leave articles as 'new' so they'll be retried later
+        session.rollback()
+        return False
+
+def _early_notifier(art: Article, candidates: list) -> "streaming.EarlyNotifier":
+    """Notifier for the candidates that opted into early notifications."""
+    users = {}
+    for c in candidates:
+        u = get_user(c["username"])
+        # coalesced users get digests; an early ping per article would defeat that
+        if u and u.webhook and u.coalesce_window is None and (u.early_notify or u.progressive_edits):
+            users[u.username] = u
+    return streaming.EarlyNotifier(art.id, art.title, art.link, users, art.notified)
+
+def _process_articles(session: Session, articles: list, handle, concurrency: int = 1) -> None:
+    """
+    Run `handle(session, article)` over `articles`, stopping early on shutdown.
+    With concurrency > 1 the articles are split across threads, each with its
+    own session.
+    """
+    report(total=len(articles), done=0)
+    if concurrency <= 1 or len(articles) <= 1:
+        for art in articles:
+            if stopping():
+                logging.info("Shutdown requested; leaving remaining articles for the next run")
+                return
+            handle(session, art)
+            advance()
+        return
+
+    def worker(ids):
+        sess = SessionLocal()
+        try:
+            for article_id in ids:
+                if stopping():
+                    return
+                art = sess.get(Article, article_id)
+                if art is not None:
+                    handle(sess, art)
+                advance()
+        finally:
+            sess.close()
+
+    ids = [a.id for a in articles]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, worker, ids[i::concurrency])
+            for i in range(concurrency)
+        ]
+        for future in futures:
+            future.result()
+
+def _absorb_duplicate(session: Session, art: Article) -> bool:
+    """
+    Attach `art` to the cluster of an already summarized near-duplicate.
+    Cluster members are not summarized or dispatched themselves; they are
+    listed as additional sources in the representative's message.
+    """
+    rep_link = dedup.find_representative(art)
+    if not rep_link:
+        return False
+    rep = session.query(Article).filter_by(link=rep_link).first()
+    if rep is None or rep.status == ArticleStatus.new:
+        return False
+    with span("dedup.absorb", link=art.link, representative=rep.link):
+        rep.cluster_id = rep.link
+        art.cluster_id = rep.link
+        art.ai_summary = rep.ai_summary
+        art.recipients = rep.recipients
+        art.status = ArticleStatus.sent
+        art.sent = True
+        coordination.release(art)
+        session.commit()
+    return True
+
+def _cluster_sources(session: Session, art: Article) -> str:
+    """Markdown list of the other feeds that carried the same story."""
+    if art.cluster_id != art.link:
+        return ""
+    members = (
+        session.query(Article)
+        .filter(Article.cluster_id == art.link, Article.link != art.link)
+        .all()
+    )
+    if not members:
+        return ""
+    lines = [f"- [{m.title}]({m.link}) ({m.feed_name})" for m in members]
+    return "# Also reported by\n" + "\n".join(lines) + "\n"
+
+def _claim_unsent(session: Session, exclude: set) -> list:
+    criteria = [Article.status == ArticleStatus.summarized, Article.sent == False]  # noqa: E712
+    if exclude:
+        criteria.append(Article.id.notin_(exclude))
+    with span("db.query", query="unsent_articles") as sp:
+        unsent = coordination.claim_articles(session, *criteria, order_by=Article.published.desc().nullslast())
+        sp.set_attribute("rows", len(unsent))
+    return unsent
 
 def dispatch_pending(session: Session):
     logging.info(f"Dispatching articles to users via webhooks")
-    unsent = session.query(Article).filter_by(status=ArticleStatus.summarized, sent=False).all()
-    for art in unsent:
-        recs = json.loads(art.recipients or "[]")
-        success = True
-        for uname in recs:
-            u = session.query(User).filter_by(username=uname).first()
-            if u and u.webhook:
-                try:
-                    # construct content for webhook
-                    
-                    content = f'# [{art.title}]({art.link})\n # AI Summary\n{art.ai_summary} \n# Abstract\n{art.summary}\n'
-                    if len(content.split()) > 1500:
-                        content = " ".join(content.split()[:1500]) + "..."
-                    # dispatch to user webhook
-                    response = requests.post(u.webhook, json={"ai_summary": content}, timeout=30)
-                    logging.info(f"Dispatching article {art.link} to {uname} with status {response.status_code}")
-                    time.sleep(2)  # Rate limit to avoid hitting webhook too fast
-                except Exception:
-                    success = False
-            else:
-                logging.info(f"User {uname} not found or has no webhook configured.")
-                logging.warning(f"User {uname} not found or has no webhook configured.")
+    attempted = set()
+    unsent = _claim_unsent(session, attempted)
+    # users with a coalescing window get one combined message per window
+    for user in sorted((u for u in load_users() if u.coalesce_window is not None), key=lambda u: -(u.priority or 0)):
+        if stopping():
+            break
+        _dispatch_coalesced(session, user, unsent)
+    feed_priority = _feed_priorities()
+    while unsent and not stopping():
+        # sliced like summarize_and_push so newly summarized urgent articles get in
+        ordered = priority.schedule(unsent, lambda a: feed_priority.get(a.feed_name, 0) + _recipient_priority(a))
+        part = priority.next_slice(ordered)
+        attempted.update(a.id for a in part)
+        _process_articles(session, part, _dispatch_one, DISPATCH_CONCURRENCY)
+        if len(part) == len(ordered):
+            break
+        unsent = _claim_unsent(session, attempted)
+
+def _feed_priorities() -> dict:
+    feeds, _ = load_config()
+    return {f["name"]: f.get("priority", 0) for f in feeds}
+
+def _user_priority(username: str) -> int:
+    u = get_user(username)
+    return (u.priority or 0) if u else 0
+
+def _recipient_priority(art: Article) -> int:
+    """Highest priority among the recipients still waiting for `art`."""
+    delivered = set(art.delivered or [])
+    return max((_user_priority(r) for r in art.recipients or [] if r not in delivered), default=0)
+
+def _article_message(session: Session, art: Article, abstract: bool = True) -> str:
+    sources = _cluster_sources(session, art)
+    content = f'# [{art.title}]({art.link})\n # AI Summary\n{art.ai_summary} \n{sources}'
+    if abstract:
+        content += f'# Abstract\n{prepare_article(art)}\n'
+    return content
+
+def _mark_delivered(art: Article, username: str) -> None:
+    # reassign (not append) so the JSONB column is flagged as changed
+    art.delivered = sorted(set(art.delivered or []) | {username})
+
+def _dispatch_coalesced(session: Session, user: User, articles: list) -> None:
+    """
+    Send `user` one combined message for all their ready articles once the
+    oldest has waited `coalesce_window` seconds or `coalesce_max_items` are
+    buffered. Delivered articles are checkpointed like single deliveries.
+    """
+    items = [
+        art for art in articles
+        if user.username in (art.recipients or [])
+        and user.username not in (art.delivered or [])
+    ]
+    if not items or not user.webhook:
+        return
+    now = datetime.now(timezone.utc)
+    # not updated_at: claims and delivery checkpoints bump it, so the window would keep sliding
+    ready = [art.summarized_at or art.updated_at for art in items]
+    oldest = min((ts for ts in ready if ts), default=now)
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    window_due = (now - oldest).total_seconds() >= user.coalesce_window
+    size_due = user.coalesce_max_items and len(items) >= user.coalesce_max_items
+    if not (window_due or size_due):
+        logging.info(f"Buffering {len(items)} articles for {user.username} (coalescing window)")
+        return
+    items = items[: user.coalesce_max_items] if user.coalesce_max_items else items
+    body = "\n".join(_article_message(session, art, abstract=False) for art in items)
+    chunks = chunk_message(
+        body,
+        user.max_payload_chars,
+        header=f"# {len(items)} new articles\n",
+        continued_header=f"# {len(items)} new articles (continued)\n",
+    )
+    try:
+        post_chunks(user.webhook, chunks, user=user.username, articles=len(items))
+    except Exception as e:
+        logging.warning(f"Coalesced delivery of {len(items)} articles to {user.username} failed: {e}")
+        return
+    for art in items:
+        _mark_delivered(art, user.username)
+    session.commit()
+    logging.info(f"Dispatched {len(items)} articles to {user.username} in {len(chunks)} message(s)")
+
+def _deliver(session: Session, art: Article, u: User, uname: str) -> int:
+    """Post `art` to one user, replacing its early notification when it can be edited."""
+    chunks = chunk_message(_article_message(session, art), u.max_payload_chars)
+    message_id = (art.notified or {}).get(uname)
+    if message_id and u.progressive_edits:
+        try:
+            edit_message(u.webhook, message_id, chunks[0], user=uname, link=art.link)
+            chunks = chunks[1:]
+        except breaker.CircuitOpen:
+            raise
+        except Exception as e:
+            logging.info(f"Editing early notification of {art.link} for {uname} failed, posting instead: {e}")
+    if chunks:
+        post_chunks(u.webhook, chunks, user=uname, link=art.link)
+    return len(chunks)
+
+def _dispatch_one(session: Session, art: Article, only: set = None, coalesce: bool = True) -> bool:
+    """
+    Post one summarized article to each recipient not yet delivered to
+    (only to the users in `only` if given; the rest stay pending). With
+    coalesce=False, users with a coalescing window are posted to directly.
+    """
+    recs = art.recipients or []
+    # recipients already posted to in an earlier, interrupted or partially failed run
+    delivered = set(art.delivered or [])
+    success = True
+    # recipients waiting in a coalescing window
+    buffered = False
+    # higher-priority users first
+    for uname in sorted(recs, key=lambda r: -_user_priority(r)):
+        if uname in delivered:
+            continue
+        if only is not None and uname not in only:
+            success = False
+            continue
+        if stopping():
+            success = False
+            break
+        u = get_user(uname)
+        # a coalescing user without a webhook could never be delivered to; do not wait for them
+        if coalesce and u and u.webhook and u.coalesce_window is not None:
+            buffered = True
+            continue
+        if u and u.webhook:
+            try:
+                # construct content for webhook, split to the user's max payload size
+                posted = _deliver(session, art, u, uname)
+                logging.info(f"Dispatched article {art.link} to {uname} in {posted} new message(s)")
+                # checkpoint each delivery so a restart never re-posts it
+                _mark_delivered(art, uname)
+                delivered.add(uname)
+                session.commit()
+                time.sleep(2)  # Rate limit to avoid hitting webhook too fast
+            except breaker.CircuitOpen as e:
+                logging.info(f"Deferring delivery of {art.link} to {uname}: {e}")
+                success = False
+            except Exception as e:
+                logging.warning(f"Webhook delivery of {art.link} to {uname} failed: {e}")
+                session.rollback()
                 success = False
-        if success:
-            art.sent = True
-            art.status = ArticleStatus.sent
-            session.commit()
-            # dispatch_summary(art, art.ai_summary) # ! not necessary, if you want to use webhook, you can use the above code
-            logging.info(f"Dispatched article {art.link} to {recs}")
-            logging.info(f"Dispatched article {art.link} to {recs}")
         else:
-            # session.rollback()
-            art.sent = False
-            art.status = ArticleStatus.new
-            session.commit()
+            # undeliverable; retrying would never succeed
+            logging.warning(f"User {uname} not found or has no webhook configured.")
+    coordination.release(art)
+    if success and not buffered:
+        art.sent = True
+        art.status = ArticleStatus.sent
+        session.commit()
+        # dispatch_summary(art, art.ai_summary) # ! not necessary, if you want to use webhook, you can use the above code
+        logging.info(f"Dispatched article {art.link} to {recs}")
+        return True
+    else:
+        # back to (or stay) 'summarized' so only the missing deliveries are retried
+        # next run, without paying for summarization again
+        art.sent = False
+        art.status = ArticleStatus.summarized
+        session.commit()
+        return False
 
 def _poll_job(feeds):
     jobid = time.asctime()
     logging.info(f"Starting poll job with feeds at {jobid}")
+    feeds = coordination.owned_feeds(feeds)
+    with profile_job("poll"), span("job.poll", feeds=len(feeds)):
+        if POLL_CONCURRENCY > 1:
+            with ThreadPoolExecutor(max_workers=POLL_CONCURRENCY) as pool:
+                for future in [pool.submit(contextvars.copy_context().run, _fetch_one, f) for f in feeds]:
+                    future.result()
+        else:
+            session = SessionLocal()
+            try:
+                for f in feeds:
+                    if stopping():
+                        break
+                    fetch_and_store(session, f)
+            finally:
+                session.close()
+    logging.info(f"Finished poll job at {jobid}")
+
+def _fetch_one(feed: dict) -> None:
+    if stopping():
+        return
     session = SessionLocal()
     try:
-        for f in feeds:
-            fetch_and_store(session, f)
+        fetch_and_store(session, feed)
     finally:
         session.close()
-    logging.info(f"Finished poll job at {jobid}")
 
 def _summarize_job():
     jobid = time.asctime()
     logging.info(f"Starting summarize job at {jobid}")
     session = SessionLocal()
     try:
-        summarize_and_push(session)
+        with profile_job("summarize"), span("job.summarize"):
+            summarize_and_push(session)
     finally:
         session.close()
     logging.info(f"Finished summarize job at {jobid}")
@@ -185,52 +621,99 @@ def _dispatch_job():
     logging.info(f"Starting dispatch job at {jobid}")
     session = SessionLocal()
     try:
-        dispatch_pending(session)
+        with profile_job("dispatch"), span("job.dispatch"):
+            dispatch_pending(session)
     finally:
         session.close()
     logging.info(f"Finished dispatch job at {jobid}")
+
+def fetch_job(feeds: list) -> None:
+    """On-demand fetch of `feeds` followed by summarization (run as a background job)."""
+    report(phase="fetch", feeds_total=len(feeds), feeds_done=0)
+    for f in feeds:
+        if stopping():
+            return
+        _fetch_one(f)
+        advance("feeds_done")
+    report(phase="summarize")
+    _summarize_job()
+    report(phase="finished")
+
+def dispatch_job() -> None:
+    """On-demand dispatch of pending articles (run as a background job)."""
+    report(phase="dispatch")
+    _dispatch_job()
+    report(phase="finished")
+
+def _plugin_job(plugin):
+    if plugin.singleton and not coordination.is_leader():
+        logging.info(f"Skipping plugin '{plugin.name}': not the cluster leader")
+        return
+    session = SessionLocal()
+    try:
+        with profile_job(f"plugin-{plugin.name}"), span("job.plugin", plugin=plugin.name):
+            plugin.run(session)
+    finally:
+        session.close()
     
         
 # --- Background tasks ---
-async def poll_loop():
-    while True:
+# Loops run under app.services.supervisor: they return once shutdown begins,
+# and an exception escaping a loop restarts it with backoff.
+async def poll_loop(skip_first: bool = False):
+    while not stopping():
         feeds, interval = load_config()
-        await asyncio.to_thread(_poll_job, feeds)
-        await asyncio.sleep(interval)
+        if skip_first:
+            skip_first = False
+        else:
+            await asyncio.to_thread(_poll_job, feeds)
+        if await supervisor.wait(interval):
+            break
+
+async def heartbeat_loop():
+    """Keep this worker registered for feed sharding and contend for leadership."""
+    while not stopping():
+        await asyncio.to_thread(coordination.heartbeat_tick)
+        if await supervisor.wait(coordination.HEARTBEAT_INTERVAL):
+            break
 
 async def summarize_loop():
-    while True:
+    while not stopping():
         await asyncio.to_thread(_summarize_job)
-        await asyncio.sleep(SUMMARIZE_INTERVAL)
+        if await supervisor.wait(SUMMARIZE_INTERVAL):
+            break
 
 async def dispatch_loop():
     interval = int(os.getenv("DISPATCH_INTERVAL", 300))
-    while True:
+    while not stopping():
         await asyncio.to_thread(_dispatch_job)
-        await asyncio.sleep(interval)
+        if await supervisor.wait(interval):
+            break
         
         
 
 async def _run_interval(plugin, interval: int):
     """Helper loop to run a plugin at a fixed interval (in seconds)."""
-    while True:
+    while not stopping():
         try:
-            await asyncio.to_thread(plugin.run, SessionLocal())
+            await asyncio.to_thread(_plugin_job, plugin)
         except Exception as e:
             logging.error(f"Error in plugin '{plugin.name}' interval run: {e}")
-        await asyncio.sleep(interval)
+        if await supervisor.wait(interval):
+            break
 
 async def _run_daily(plugin, time_str: str):
     """Helper loop to run a plugin once a day at the specified HH:MM local time."""
     hour, minute = map(int, time_str.split(':'))
-    while True:
+    while not stopping():
         now = datetime.now()
         next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
         if now >= next_run:
             next_run += timedelta(days=1)
-        await asyncio.sleep((next_run - now).total_seconds())
+        if await supervisor.wait((next_run - now).total_seconds()):
+            break
         try:
-            await asyncio.to_thread(plugin.run, SessionLocal())
+            await asyncio.to_thread(_plugin_job, plugin)
         except Exception as e:
             logging.error(f"Error in plugin '{plugin.name}' daily run: {e}")
 
@@ -247,42 +730,115 @@ async def plugin_loop():
             ptype = getattr(plugin, "schedule_type", "interval")
             if ptype == "daily":
                 time_str = plugin.schedule_time or "00:00"
-                asyncio.create_task(_run_daily(plugin, time_str))
+                supervisor.start(f"plugin:{name}", lambda p=plugin, t=time_str: _run_daily(p, t))
             else:
                 interval = plugin.schedule_interval or int(os.getenv("PLUGIN_INTERVAL", 86400))
-                asyncio.create_task(_run_interval(plugin, interval))
+                supervisor.start(f"plugin:{name}", lambda p=plugin, i=interval: _run_interval(p, i))
         except Exception as e:
             logging.error(f"Failed to schedule plugin '{name}': {e}")
 
 def _initial_seed() -> None:
+    """Insert feeds/users from the YAML files with bulk upserts (existing rows are kept)."""
+    from sqlalchemy.dialects.postgresql import insert
+
+    with open(CONFIG_PATH) as f:
+        cfg = yaml.safe_load(f) or {}
+    feed_rows = [
+        {"name": fdef.get("name"), "url": fdef.get("url"), "priority": int(fdef.get("priority", 0))}
+        for fdef in cfg.get("feeds", [])
+        if fdef.get("name")
+    ]
+    user_rows = []
+    if os.path.exists(USERS_CONFIG_PATH):
+        with open(USERS_CONFIG_PATH) as uf:
+            ucfg = yaml.safe_load(uf) or {}
+        user_rows = [
+            {
+                "username": udef.get("username"),
+                "webhook": udef.get("webhook"),
+                "interests": udef.get("interests", []),
+                "priority": int(udef.get("priority", 0)),
+            }
+            for udef in ucfg.get("users", [])
+            if udef.get("username")
+        ]
     session = SessionLocal()
     try:
-        with open(CONFIG_PATH) as f:
-            cfg = yaml.safe_load(f) or {}
-        for fdef in cfg.get("feeds", []):
-            if not session.query(Feed).filter_by(name=fdef.get("name")).first():
-                session.add(Feed(name=fdef.get("name"), url=fdef.get("url")))
-        if os.path.exists(USERS_CONFIG_PATH):
-            with open(USERS_CONFIG_PATH) as uf:
-                ucfg = yaml.safe_load(uf) or {}
-            for udef in ucfg.get("users", []):
-                if not session.query(User).filter_by(username=udef.get("username")).first():
-                    session.add(
-                        User(
-                            username=udef.get("username"),
-                            webhook=udef.get("webhook"),
-                            interests=udef.get("interests", []),
-                        )
-                    )
+        if feed_rows:
+            session.execute(insert(Feed).values(feed_rows).on_conflict_do_nothing(index_elements=["name"]))
+        if user_rows:
+            session.execute(insert(User).values(user_rows).on_conflict_do_nothing(index_elements=["username"]))
         session.commit()
+        cache.invalidate("users", "feeds")
     finally:
         session.close()
 
 def _initial_fetch() -> None:
-    session = SessionLocal()
+    feeds, _ = load_config()
+    feeds = coordination.owned_feeds(feeds)
+    STARTUP_STATE["feeds_total"] = len(feeds)
+    STARTUP_STATE["feeds_done"] = 0
+
+    def fetch(feed):
+        _fetch_one(feed)
+        STARTUP_STATE["feeds_done"] += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, POLL_CONCURRENCY)) as pool:
+        list(pool.map(fetch, feeds))
+
+async def startup_tasks(roles=None) -> None:
+    """
+    Bring the service up in the background so the API can serve (and answer
+    liveness probes) immediately: init DB, seed, start the loops of `roles`
+    (default: BACKGROUND_ROLES), and do the initial fetch if polling.
+    """
+    roles = parse_roles(BACKGROUND_ROLES) if roles is None else roles
+    from app.db import init_db
+
+    attempt, delay = 0, 1.0
+    while True:
+        attempt += 1
+        try:
+            STARTUP_STATE["phase"] = "init_db"
+            await asyncio.to_thread(init_db)
+            STARTUP_STATE["phase"] = "seed"
+            await asyncio.to_thread(_initial_seed)
+            break
+        except Exception as e:
+            # e.g. the database is still starting up
+            logging.error(f"Startup failed during {STARTUP_STATE['phase']} (attempt {attempt}): {e}")
+            STARTUP_STATE["error"] = str(e)
+            if STARTUP_MAX_ATTEMPTS and attempt >= STARTUP_MAX_ATTEMPTS:
+                STARTUP_STATE["fatal"] = True
+                return
+        if await supervisor.wait(delay):
+            return
+        delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+    STARTUP_STATE["error"] = None
+    STARTUP_STATE["db_ready"] = True
+    if coordination.CLUSTER_ENABLED and roles:
+        coordination.set_roles(roles)
+        await asyncio.to_thread(coordination.heartbeat_tick)
+        supervisor.start("heartbeat", heartbeat_loop)
+    if "summarizer" in roles:
+        supervisor.start("summarize", summarize_loop)
+    if "dispatcher" in roles:
+        supervisor.start("dispatch", dispatch_loop)
+    if "scheduler" in roles:
+        await plugin_loop()
+        await asyncio.to_thread(replay.resume_interrupted)
+    if "poller" not in roles:
+        STARTUP_STATE["phase"] = "running"
+        return
+
+    STARTUP_STATE["phase"] = "initial_fetch"
+    fetched = False
     try:
-        feeds, _ = load_config()
-        for feed in feeds:
-            fetch_and_store(session, feed)
-    finally:
-        session.close()
\ No newline at end of file
+        await asyncio.to_thread(_initial_fetch)
+        fetched = True
+    except Exception as e:
+        logging.error(f"Initial fetch failed: {e}")
+        STARTUP_STATE["error"] = str(e)
+    STARTUP_STATE["phase"] = "running"
+    # the initial fetch already covered the first poll cycle
+    supervisor.start("poll", lambda: poll_loop(skip_first=fetched))
@@ -1,6 +1,6 @@
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -21,8 +21,11 @@ def init_db():
     from sqlalchemy.exc import OperationalError as SAOperationalError
     from sqlalchemy.engine.url import make_url
     import logging
+    from app.services import storage
 
     try:
+        storage.migrate_article_storage()
+        new_bodies = not inspect(engine).has_table("article_bodies")
         Base.metadata.create_all(bind=engine)
     except SAOperationalError:
         url = make_url(DATABASE_URL)
@@ -34,5 +37,43 @@ def init_db():
             conn.execute("commit")
             conn.execute(f'CREATE DATABASE "{db_name}"')
         default_engine.dispose()
+        new_bodies = True
         Base.metadata.create_all(bind=engine)
+    if new_bodies:
+        storage.ensure_body_compression()
+    add_missing_columns()
+    add_missing_indexes()
 
+
+def add_missing_columns():
+    """
+    create_all() does not alter existing tables; add any nullable or
+    defaulted columns declared on the models but missing in the database.
+    """
+    import logging
+
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'
+                default = getattr(column.default, "arg", None)
+                if isinstance(default, (bool, int, float)):
+                    ddl += f" DEFAULT {str(default).upper() if isinstance(default, bool) else default}"
+                logging.warning(f"Adding missing column {table.name}.{column.name}")
+                conn.execute(text(ddl))
+
+
+
+
+def add_missing_indexes():
+    """Create indexes declared on the models but missing on existing tables."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, BigInteger, DateTime, func
+
+from app.db import Base
+
+
+class ArchivedKey(Base):
+    """Compact dedup key of an archived article so it is never re-ingested."""
+
+    __tablename__ = "archived_keys"
+
+    # signed 64-bit prefix of sha1(feed_name + "\0" + entry_id)
+    key_hash = Column(BigInteger, primary_key=True, autoincrement=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -2,14 +2,21 @@ import enum
 
 from sqlalchemy import (
     Column,
-    Integer,
+    BigInteger,
+    Identity,
+    ForeignKey,
     String,
     Text,
     DateTime,
     Enum,
     Boolean,
+    LargeBinary,
+    Index,
     UniqueConstraint,
 )
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from app.db import Base
@@ -21,23 +28,69 @@ class ArticleStatus(enum.Enum):
     sent = "sent"
 
 
+class ArticleBody(Base):
+    """
+    Large text of an article, kept out of the hot `articles` rows so queue
+    scans and status updates stay small. Loaded lazily on first access.
+    """
+
+    __tablename__ = "article_bodies"
+
+    article_id = Column(BigInteger, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text, nullable=True)
+    # summary stripped of HTML/boilerplate and truncated to the token budget
+    clean_summary = Column(Text, nullable=True)
+    ai_summary = Column(Text, nullable=True)
+
+
+def _body_field(name: str):
+    """Expose ArticleBody.<name> on Article, creating the body row on first write."""
+    return association_proxy("body", name, creator=lambda value: ArticleBody(**{name: value}))
+
+
 class Article(Base):
     __tablename__ = "articles"
     __table_args__ = (
         UniqueConstraint("feed_name", "entry_id", name="uix_feed_entry"),
+        # queue lookups (summarize/dispatch) and retention scans
+        Index("ix_articles_status_sent", "status", "sent"),
+        Index("ix_articles_created_at", "created_at"),
+        # admin listing (newest first, paginated)
+        Index("ix_articles_updated_at", "updated_at"),
     )
 
+    id = Column(BigInteger, Identity(), primary_key=True)
     feed_name = Column(String, index=True, nullable=False)
     entry_id = Column(String, index=True, nullable=False)
     title = Column(String, nullable=True)
-    link = Column(String, primary_key=True, index=True, nullable=False)
+    link = Column(String, unique=True, index=True, nullable=False)
     published = Column(DateTime, nullable=True)
-    summary = Column(Text, nullable=True)
-    ai_summary = Column(Text, nullable=True)
-    recipients = Column(Text, nullable=True)
+    recipients = Column(JSONB, nullable=True)
+    # recipients the article was already posted to (dispatch checkpoint)
+    delivered = Column(JSONB, nullable=True)
+    # early "new article" notifications of the streaming path: {username: message id or null}
+    notified = Column(JSONB, nullable=True)
+    # link of the representative article of this near-duplicate cluster
+    cluster_id = Column(String, index=True, nullable=True)
+    # float32 embedding of title + clean summary
+    embedding = deferred(Column(LargeBinary, nullable=True))
+    # "<backend>:<model>" the embedding was made with; vectors of another model are redone
+    embedding_model = Column(String, nullable=True)
     sent = Column(Boolean, default=False, nullable=False)
+    # when the article became ready for dispatch (coalescing windows start here)
+    summarized_at = Column(DateTime(timezone=True), nullable=True)
+    # offline summary batch this article was exported to (see app.services.batch)
+    batch_id = Column(BigInteger, index=True, nullable=True)
+    # worker currently processing this article (cluster mode only)
+    claimed_by = Column(String, index=True, nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
     status = Column(Enum(ArticleStatus), default=ArticleStatus.new, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(
         DateTime(timezone=True), onupdate=func.now(), server_default=func.now(), nullable=False
     )
+
+    body = relationship(ArticleBody, uselist=False, lazy="select", cascade="all, delete-orphan", passive_deletes=True)
+    summary = _body_field("summary")
+    clean_summary = _body_field("clean_summary")
+    ai_summary = _body_field("ai_summary")
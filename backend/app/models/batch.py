@@ -0,0 +1,25 @@
+from sqlalchemy import Column, BigInteger, Identity, Integer, String, Text, DateTime, func
+
+from app.db import Base
+
+
+class SummaryBatch(Base):
+    """An offline summarization batch submitted to a provider batch API."""
+
+    __tablename__ = "summary_batches"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    # openai | local
+    backend = Column(String, nullable=False)
+    route = Column(String, nullable=True)
+    # provider's batch id (local: path of the output file)
+    provider_id = Column(String, nullable=True)
+    # submitted -> completed | failed
+    state = Column(String, nullable=False, default="submitted", index=True)
+    input_path = Column(String, nullable=False)
+    items = Column(Integer, nullable=False, default=0)
+    applied = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, func
+
+from app.db import Base
+
+
+class EndpointHealth(Base):
+    """Circuit-breaker state and health score of a feed or webhook host."""
+
+    __tablename__ = "endpoint_health"
+
+    # "feed:<feed name>" or "webhook:<host>"
+    key = Column(String, primary_key=True)
+    kind = Column(String, nullable=False, index=True)
+    # closed (healthy), open (cooling down), half_open (probing)
+    state = Column(String, nullable=False, default="closed")
+    # exponentially weighted success rate in [0, 1]
+    score = Column(Float, nullable=False, default=1.0)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    total_failures = Column(Integer, nullable=False, default=0)
+    total_successes = Column(Integer, nullable=False, default=0)
+    open_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    last_success_at = Column(DateTime(timezone=True), nullable=True)
+    last_failure_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -8,5 +8,7 @@ class Feed(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, nullable=False, index=True)
     url = Column(String, nullable=False)
+    # queue priority of its articles: > 0 urgent lane, < 0 backfill lane (see app.services.priority)
+    priority = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
@@ -0,0 +1,37 @@
+from sqlalchemy import Boolean, Column, BigInteger, Identity, Integer, String, Text, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db import Base
+
+
+class Replay(Base):
+    """A throttled re-run of summarization and/or dispatch over selected articles."""
+
+    __tablename__ = "replays"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    # selection (None: any)
+    feed_name = Column(String, nullable=True)
+    since = Column(DateTime(timezone=True), nullable=True)
+    until = Column(DateTime(timezone=True), nullable=True)
+    status = Column(String, nullable=True)
+    # what to re-run
+    summarize = Column(Boolean, nullable=False, default=False)
+    dispatch = Column(Boolean, nullable=False, default=False)
+    # deliver only to these users (None: all recipients)
+    users = Column(JSONB, nullable=True)
+    # throttling
+    chunk_size = Column(Integer, nullable=False, default=20)
+    pause = Column(Integer, nullable=False, default=30)
+    # pending -> running -> completed | failed | cancelled
+    state = Column(String, nullable=False, default="pending", index=True)
+    # id of the last article handled; the replay resumes after it
+    cursor = Column(BigInteger, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
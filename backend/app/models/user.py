@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, LargeBinary, func
 from sqlalchemy.dialects.postgresql import JSONB
 from ..db import Base
 
@@ -10,5 +10,24 @@ class User(Base):
     username = Column(String, unique=True, nullable=False, index=True)
     webhook = Column(String, nullable=False)
     interests = Column(JSONB, nullable=False, default=list)
+    # float32 matrix (one row per interest) used for embedding-based matching
+    interests_embedding = Column(LargeBinary, nullable=True)
+    embedding_dim = Column(Integer, nullable=True)
+    # hash of interests + embedding model; re-embed when it changes
+    interests_hash = Column(String, nullable=True)
+    # minimum cosine similarity for this user (falls back to embeddings_threshold)
+    match_threshold = Column(Float, nullable=True)
+    # webhook coalescing: buffer ready articles up to this many seconds (None: send each article)
+    coalesce_window = Column(Integer, nullable=True)
+    # ... or until this many are buffered
+    coalesce_max_items = Column(Integer, nullable=True)
+    # max characters per webhook message (falls back to WEBHOOK_MAX_CHARS)
+    max_payload_chars = Column(Integer, nullable=True)
+    # dispatch priority: articles for higher-priority users are delivered first
+    priority = Column(Integer, default=0, nullable=False)
+    # streaming mode: post a "new article" note as soon as the user is picked as a recipient
+    early_notify = Column(Boolean, default=False, nullable=False)
+    # ... and edit that message as the summary streams in (the webhook must return a message id)
+    progressive_edits = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
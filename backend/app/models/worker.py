@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db import Base
+
+
+class Worker(Base):
+    """A live backend process taking part in feed sharding (see app.services.coordination)."""
+
+    __tablename__ = "workers"
+
+    id = Column(String, primary_key=True)
+    hostname = Column(String, nullable=True)
+    # background roles this process runs (poller, summarizer, ...)
+    roles = Column(JSONB, nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    heartbeat_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
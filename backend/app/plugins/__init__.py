@@ -4,7 +4,9 @@ Plugin system for custom scheduled tasks. Individual plugins should be listed in
 """
 from .base import Plugin  # noqa: F401
 from .daily_summary import plugin as daily_summary  # default daily summary plugin
+from .retention import plugin as retention  # archival of old sent articles
 
 __all__ = [
     "daily_summary",
+    "retention",
 ]
\ No newline at end of file
@@ -21,6 +21,12 @@ class Plugin(BaseModel, abc.ABC):
         description="Time of day (HH:MM) when schedule_type='daily'",
     )
 
+    # in cluster mode, run only on the elected leader (False: run on every replica)
+    singleton: bool = Field(
+        True,
+        description="Run on the cluster leader only",
+    )
+
     # allow arbitrary types (e.g. SQLAlchemy Session) in BaseModel
     model_config = {"arbitrary_types_allowed": True}
 
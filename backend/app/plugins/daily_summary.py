@@ -1,17 +1,14 @@
-import os
 import logging
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
 
 from .base import Plugin
 from app.models.article import Article, ArticleStatus
 from app.core import load_users
-import json
-import requests
-import yaml
-import time
+from app.services.tracing import span
+from app.services.payload import chunk_message, post_chunks
+from app.services.supervisor import stopping
 
 
 
@@ -29,27 +26,9 @@ class DailySummaryPlugin(Plugin):
 
     def run(self, session: Session) -> None:
         
-        from app.core import load_llm_config
-
-        _llm_cfg = load_llm_config()
-        MODEL_NAME = _llm_cfg.get(
-            "model_name", os.getenv("MODEL_NAME", "gpt-4.1")
-        )
-        TEMPERATURE = float(
-            _llm_cfg.get("model_temperature", os.getenv("MODEL_TEMPERATURE", 0.5))
-        )
-        MAX_TOKENS = int(
-            _llm_cfg.get("model_max_tokens", os.getenv("MODEL_MAX_TOKENS", 4096))
-        )
-        OPENAI_API_BASE = _llm_cfg.get("openai_api_base") or os.getenv("OPENAI_API_BASE")
-
-        _llm_kwargs = {"model_name": MODEL_NAME, "temperature": TEMPERATURE}
-        if MAX_TOKENS:
-            _llm_kwargs["max_tokens"] = MAX_TOKENS
-        if OPENAI_API_BASE:
-            _llm_kwargs["openai_api_base"] = OPENAI_API_BASE
-
-        LLM = ChatOpenAI(**_llm_kwargs)
+        from langchain_core.messages import SystemMessage, HumanMessage
+        from app.services import llm_router
+        from app.services.content import count_tokens
         
         
         # print(f"Running {self.name} plugin...")
@@ -59,15 +38,21 @@ class DailySummaryPlugin(Plugin):
         since = datetime.utcnow() - timedelta(days=1)
         users = load_users()
         for user in users:
+            if stopping():
+                logging.info("[DailySummary] shutdown requested; skipping remaining users")
+                break
             # Query articles delivered to this user in the last day
-            arts = (
+            user_arts = (
                 session.query(Article)
                 .filter(Article.sent == True)
                 .filter(Article.updated_at >= since)
+                # skip near-duplicates; their representative lists them as sources
+                .filter(or_(Article.cluster_id.is_(None), Article.cluster_id == Article.link))
+                # recipients is JSONB: match this user in SQL
+                .filter(Article.recipients.contains([user.username]))
+                .options(selectinload(Article.body))
                 .all()
             )
-            # Filter by recipients for this user
-            user_arts = [a for a in arts if user.username in json.loads(a.recipients or "[]")]
             if not user_arts:
                 continue
 
@@ -84,7 +69,8 @@ class DailySummaryPlugin(Plugin):
                 HumanMessage(content="\n".join(lines)),
             ]
             try:
-                resp = LLM.invoke(messages)
+                with span("llm.daily_summary", user=user.username, articles=len(user_arts)):
+                    resp = llm_router.invoke(messages, input_tokens=count_tokens(messages[-1].content))
                 highlight = resp.content.strip()
                 # remove think content wraped in <think></think>
                 # find the </think> tag and remove everything before it
@@ -94,32 +80,19 @@ class DailySummaryPlugin(Plugin):
                     highlight = highlight[think_end:].strip()
                 logging.warning(f"[DailySummary:{user.username}] {highlight}")
                 webhook = getattr(user, 'webhook', None)
-                # calclulate the length of the highlight
-                highlight_length = len(highlight.split())
-                if highlight_length > 2000:
-                    logging.warning(f"[DailySummary:{user.username}] Highlight is too long: {highlight_length} words.")
-                    for i in range(0,len(highlight.split()), 1500):
-                        chunk = " ".join(highlight.split()[i:i+1500])
-                        if i == 0:
-                            payload = {"ai_summary": f'# Daily Summary: \n{chunk}'}
-                        else:
-                            payload = { "ai_summary": f'# Daily Summary (continued): \n{chunk}'}
-                        try:
-                            requests.post(webhook, json=payload, timeout=3600)
-                            time.sleep(1)  # avoid hitting rate limits
-                        except Exception as e:
-                            logging.warning(f"[DailySummary] webhook failed for {user.username}: {e}")
-                
-                else:
-                    # Send highlight to this user's webhook
+                if webhook:
+                    # Send highlight to this user's webhook, split to their max payload size
                     logging.info(f"[DailySummary] Sending summary to webhook for {user.username}: {webhook}")
-                    if webhook:
-                        payload = {"ai_summary": f'# Daily Summary: \n{highlight}'}
-                        try:
-                            requests.post(webhook, json=payload, timeout=3600)
-                            time.sleep(1)  # avoid hitting rate limits
-                        except Exception as e:
-                            logging.warning(f"[DailySummary] webhook failed for {user.username}: {e}")
+                    chunks = chunk_message(
+                        highlight,
+                        user.max_payload_chars,
+                        header="# Daily Summary: \n",
+                        continued_header="# Daily Summary (continued): \n",
+                    )
+                    try:
+                        post_chunks(webhook, chunks, timeout=3600, user=user.username, plugin=self.name)
+                    except Exception as e:
+                        logging.warning(f"[DailySummary] webhook failed for {user.username}: {e}")
             except Exception as e:
                 logging.error(f"Error in daily summary plugin for {user.username}: {e}")
 
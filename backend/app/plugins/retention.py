@@ -0,0 +1,27 @@
+import os
+import logging
+from sqlalchemy.orm import Session
+
+from .base import Plugin
+from app.services.retention import archive_old_articles, RETENTION_DAYS
+
+
+class RetentionPlugin(Plugin):
+    """Daily maintenance: archive old sent articles (see RETENTION_DAYS)."""
+
+    @property
+    def name(self) -> str:
+        return "retention"
+
+    schedule_type: str = "daily"
+    schedule_time: str = os.getenv("RETENTION_TIME", "03:30")  # HH:MM in local time
+    schedule_interval: int | None = None
+
+    def run(self, session: Session) -> None:
+        if RETENTION_DAYS <= 0:
+            return
+        logging.info(f"Running {self.name} plugin: archiving sent articles older than {RETENTION_DAYS} days")
+        archive_old_articles(session, RETENTION_DAYS)
+
+
+plugin = RetentionPlugin()
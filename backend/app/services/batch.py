@@ -0,0 +1,297 @@
+import os
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models.article import Article, ArticleStatus
+from app.models.batch import SummaryBatch
+from app.services import coordination, dedup, llm_router
+from app.services.summarize import SYSTEM_PROMPT, SummarizationResult, article_input, build_prompt, check_result
+from app.services.supervisor import stopping
+from app.services.tracing import span
+
+# Offline batch summarization for large backlogs. When there are at least
+# `batch_threshold` unsummarized articles published more than
+# `batch_fresh_hours` ago (e.g. a newly added feed with its archive), a summarize
+# run exports them as a JSONL file of chat-completion requests and submits it
+# to an OpenAI-compatible batch API; fresh articles keep going through the live
+# path. Later summarize runs (on any summarizer; a per-batch lock keeps two
+# from handling the same batch) poll the batch and bulk-apply the results. The `local` backend is a
+# stand-in for endpoints without a batch API: it works through the same file a
+# few requests per run via the LLM router. Settings live in llm.yml:
+#
+#   batch_threshold: 500      # 0 disables batch mode
+#   batch_backend: openai     # openai | local
+#   batch_route: hosted       # route whose model/endpoint is used (default: first)
+#   batch_fresh_hours: 24     # younger articles always go live
+
+# must be persistent and shared by all summarizers (docker-compose mounts `batch_data` here)
+BATCH_DIR = os.getenv("BATCH_DIR", "/data/batches")
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 5000))
+# requests the local stand-in processes per summarize run
+BATCH_LOCAL_CHUNK = int(os.getenv("BATCH_LOCAL_CHUNK", 20))
+APPLY_CHUNK = 500
+
+SUBMITTED, COMPLETED, FAILED = "submitted", "completed", "failed"
+
+
+def settings() -> dict:
+    from app.core import load_llm_config
+
+    cfg = load_llm_config()
+    return {
+        "threshold": int(cfg.get("batch_threshold", os.getenv("BATCH_THRESHOLD", 0))),
+        "backend": cfg.get("batch_backend", os.getenv("BATCH_BACKEND", "openai")),
+        "route": cfg.get("batch_route"),
+        "fresh_hours": float(cfg.get("batch_fresh_hours", os.getenv("BATCH_FRESH_HOURS", 24))),
+    }
+
+
+def _backlog_criteria(cutoff: datetime) -> list:
+    # `published` is stored without a time zone (UTC)
+    return [
+        Article.status == ArticleStatus.new,
+        Article.batch_id.is_(None),
+        or_(
+            Article.published < cutoff.replace(tzinfo=None),
+            and_(Article.published.is_(None), Article.created_at < cutoff),
+        ),
+    ]
+
+
+def claim_backlog(session: Session) -> List[Article]:
+    """
+    Claim up to BATCH_MAX_ITEMS backlog articles if the whole unsummarized
+    backlog (not just this run's claim) reaches the batch threshold.
+    """
+    cfg = settings()
+    if cfg["threshold"] <= 0:
+        return []
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=cfg["fresh_hours"])
+    criteria = _backlog_criteria(cutoff)
+    with span("db.query", query="batch_backlog") as sp:
+        backlog = session.query(Article.id).filter(*criteria).count()
+        sp.set_attribute("rows", backlog)
+    if backlog < cfg["threshold"]:
+        return []
+    ids = [row[0] for row in session.query(Article.id).filter(*criteria).order_by(Article.id).limit(BATCH_MAX_ITEMS)]
+    return coordination.claim_articles(session, Article.id.in_(ids), order_by=Article.id)
+
+
+def _route(name: Optional[str]) -> dict:
+    routes = llm_router.routes()
+    return next((r for r in routes if r["name"] == name), routes[0])
+
+
+def _openai_client(route: dict):
+    from openai import OpenAI
+
+    kwargs = {}
+    if route.get("openai_api_base"):
+        kwargs["base_url"] = route["openai_api_base"]
+    if route.get("api_key_env"):
+        kwargs["api_key"] = os.getenv(route["api_key_env"])
+    return OpenAI(**kwargs)
+
+
+def _request_line(art: Article, user_data: list, route: dict) -> str:
+    body = {
+        "model": route.get("model_name"),
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt(article_input(art), user_data)},
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "SummarizationResult", "schema": SummarizationResult.model_json_schema()},
+        },
+    }
+    if route.get("model_temperature") is not None:
+        body["temperature"] = float(route["model_temperature"])
+    if route.get("model_max_tokens"):
+        body["max_tokens"] = int(route["model_max_tokens"])
+    return json.dumps({"custom_id": str(art.id), "method": "POST", "url": "/v1/chat/completions", "body": body})
+
+
+def submit(session: Session, articles: List[Article], user_data: list) -> Optional[SummaryBatch]:
+    """Export `articles` as a batch request file and submit it. Returns None on failure."""
+    cfg = settings()
+    route = _route(cfg["route"])
+    batch = SummaryBatch(backend=cfg["backend"], route=route["name"], input_path="", items=len(articles))
+    try:
+        with span("batch.submit", backend=cfg["backend"], items=len(articles)):
+            session.add(batch)
+            session.flush()
+            os.makedirs(BATCH_DIR, exist_ok=True)
+            batch.input_path = os.path.join(BATCH_DIR, f"batch-{batch.id}.jsonl")
+            with open(batch.input_path, "w", encoding="utf-8") as f:
+                for art in articles:
+                    f.write(_request_line(art, user_data, route) + "\n")
+                    art.batch_id = batch.id
+                    coordination.release(art)
+            if cfg["backend"] == "local":
+                batch.provider_id = f"{batch.input_path}.out"
+            else:
+                client = _openai_client(route)
+                with open(batch.input_path, "rb") as f:
+                    uploaded = client.files.create(file=f, purpose="batch")
+                remote = client.batches.create(
+                    input_file_id=uploaded.id, endpoint="/v1/chat/completions", completion_window="24h"
+                )
+                batch.provider_id = remote.id
+            session.commit()
+    except Exception as e:
+        logging.error(f"Submitting summary batch of {len(articles)} articles failed; using the live path: {e}")
+        session.rollback()
+        return None
+    logging.info(f"Submitted summary batch {batch.id} ({cfg['backend']}) with {len(articles)} articles")
+    return batch
+
+
+def _run_local(batch: SummaryBatch) -> bool:
+    """Process the next chunk of a local batch. Returns True when all requests are done."""
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    with open(batch.input_path, encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    done = 0
+    if os.path.exists(batch.provider_id):
+        with open(batch.provider_id, encoding="utf-8") as f:
+            done = sum(1 for line in f if line.strip())
+    with open(batch.provider_id, "a", encoding="utf-8") as out:
+        for req in requests[done:done + BATCH_LOCAL_CHUNK]:
+            if stopping():
+                return False
+            roles = {"system": SystemMessage, "user": HumanMessage}
+            messages = [roles[m["role"]](content=m["content"]) for m in req["body"]["messages"]]
+            try:
+                result = llm_router.invoke(messages, structured=SummarizationResult)
+                line = {"custom_id": req["custom_id"], "response": {"status_code": 200, "body": {
+                    "choices": [{"message": {"content": result.model_dump_json()}}]
+                }}}
+            except Exception as e:
+                line = {"custom_id": req["custom_id"], "error": {"message": str(e)}}
+            out.write(json.dumps(line) + "\n")
+    return done + BATCH_LOCAL_CHUNK >= len(requests)
+
+
+def _parse_results(lines: List[str]) -> Dict[str, dict]:
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code", 200) != 200:
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[item["custom_id"]] = check_result(SummarizationResult.model_validate_json(content))
+        except Exception as e:
+            logging.warning(f"Unusable batch result for article {item.get('custom_id')}: {e}")
+    return results
+
+
+def _apply(session: Session, batch: SummaryBatch, results: Dict[str, dict]) -> None:
+    """Bulk-apply results; articles without a result go back to the live path."""
+    from app.core import load_users
+
+    known = {u.username for u in load_users()}
+    articles = session.query(Article).filter(Article.batch_id == batch.id).all()
+    with span("batch.apply", batch=batch.id, items=len(articles), results=len(results)):
+        for i, art in enumerate(articles, 1):
+            result = results.get(str(art.id))
+            art.batch_id = None
+            if result is None:
+                batch.failed += 1
+            else:
+                art.ai_summary = result.get("Summary_of_article", "")
+                art.recipients = [r for r in result.get("Recommend_recipients", []) if r in known]
+                art.status = ArticleStatus.summarized
+                art.sent = False
+                art.summarized_at = datetime.now(timezone.utc)
+                batch.applied += 1
+            if i % APPLY_CHUNK == 0:
+                session.commit()
+        batch.state = COMPLETED
+        batch.completed_at = datetime.now(timezone.utc)
+        session.commit()
+    if dedup.DEDUP_ENABLED:
+        for art in articles:
+            if art.status == ArticleStatus.summarized:
+                dedup.index_article(art)
+    logging.info(f"Summary batch {batch.id}: applied {batch.applied}, {batch.failed} back to the live path")
+
+
+def _fail(session: Session, batch: SummaryBatch, error: str) -> None:
+    logging.error(f"Summary batch {batch.id} failed: {error}")
+    session.query(Article).filter(Article.batch_id == batch.id).update(
+        {"batch_id": None}, synchronize_session=False
+    )
+    batch.state = FAILED
+    batch.error = error[:2000]
+    batch.completed_at = datetime.now(timezone.utc)
+    session.commit()
+
+
+def poll_batches(session: Session) -> None:
+    """Check submitted batches and apply finished ones (batches another worker is handling are skipped)."""
+    for batch in session.query(SummaryBatch).filter_by(state=SUBMITTED).order_by(SummaryBatch.id).all():
+        if stopping():
+            return
+        try:
+            with coordination.try_lock(f"summary_batch:{batch.id}") as locked, \
+                    span("batch.poll", batch=batch.id, backend=batch.backend):
+                if not locked:
+                    continue
+                session.refresh(batch)
+                if batch.state != SUBMITTED:
+                    continue
+                if batch.backend == "local":
+                    try:
+                        lines = None
+                        if _run_local(batch):
+                            with open(batch.provider_id, encoding="utf-8") as f:
+                                lines = f.read().splitlines()
+                    except (OSError, ValueError) as e:
+                        # e.g. BATCH_DIR not shared with the summarizer that submitted it;
+                        # the batch could never finish, so its articles go back to the live path
+                        _fail(session, batch, f"local batch files unavailable: {e}")
+                        continue
+                    if lines is not None:
+                        _apply(session, batch, _parse_results(lines))
+                    continue
+                client = _openai_client(_route(batch.route))
+                remote = client.batches.retrieve(batch.provider_id)
+                if remote.status in ("failed", "expired", "cancelled"):
+                    _fail(session, batch, f"provider status {remote.status}")
+                elif remote.status == "completed":
+                    lines = client.files.content(remote.output_file_id).text.splitlines() if remote.output_file_id else []
+                    _apply(session, batch, _parse_results(lines))
+        except Exception as e:
+            logging.error(f"Polling summary batch {batch.id} failed: {e}")
+            session.rollback()
+
+
+def recent_batches(session: Session, limit: int = 20) -> List[dict]:
+    rows = session.query(SummaryBatch).order_by(SummaryBatch.id.desc()).limit(limit).all()
+    return [
+        {
+            "id": b.id,
+            "backend": b.backend,
+            "route": b.route,
+            "provider_id": b.provider_id,
+            "state": b.state,
+            "items": b.items,
+            "applied": b.applied,
+            "failed": b.failed,
+            "error": b.error,
+            "created_at": b.created_at.isoformat() if b.created_at else None,
+            "completed_at": b.completed_at.isoformat() if b.completed_at else None,
+        }
+        for b in rows
+    ]
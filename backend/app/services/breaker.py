@@ -0,0 +1,198 @@
+import os
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db import SessionLocal
+from app.models.endpoint_health import EndpointHealth
+
+# Circuit breakers for feeds and webhook hosts. After BREAKER_FAILURES
+# consecutive failures an endpoint is "open" and skipped for a cool-down that
+# doubles with each further failure (BREAKER_COOLDOWN .. BREAKER_MAX_COOLDOWN).
+# When the cool-down ends one call is let through as a half-open probe: success
+# closes the breaker, failure re-opens it. State and an EWMA health score are
+# kept in memory, written through to `endpoint_health` on every change and
+# re-read every BREAKER_SYNC seconds, so replicas and split roles converge.
+
+BREAKER_ENABLED = os.getenv("BREAKER_ENABLED", "true").lower() in ("1", "true", "yes")
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 3))
+BREAKER_COOLDOWN = int(os.getenv("BREAKER_COOLDOWN", 300))
+BREAKER_MAX_COOLDOWN = int(os.getenv("BREAKER_MAX_COOLDOWN", 6 * 3600))
+# weight of the latest outcome in the health score
+SCORE_ALPHA = 0.2
+# endpoints below this score are listed as degraded even while closed
+DEGRADED_SCORE = float(os.getenv("BREAKER_DEGRADED_SCORE", 0.8))
+BREAKER_SYNC = int(os.getenv("BREAKER_SYNC", 60))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised when a call is skipped because the endpoint's breaker is open."""
+
+
+_COLUMNS = [c.name for c in EndpointHealth.__table__.columns if c.name != "updated_at"]
+
+_states: Dict[str, dict] = {}
+_probing: set = set()
+_lock = threading.Lock()
+_loaded_at = None
+
+
+def feed_key(name: str) -> str:
+    return f"feed:{name}"
+
+
+def webhook_key(url: str) -> str:
+    return f"webhook:{urlparse(url).netloc or url}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _load(force: bool = False) -> None:
+    global _loaded_at
+    if not force and _loaded_at is not None and time.monotonic() - _loaded_at < BREAKER_SYNC:
+        return
+    session = SessionLocal()
+    try:
+        for row in session.query(EndpointHealth).all():
+            _states[row.key] = {c: getattr(row, c) for c in _COLUMNS}
+    except Exception as e:
+        logging.warning(f"Could not load endpoint health: {e}")
+    finally:
+        session.close()
+    _loaded_at = time.monotonic()
+
+
+def _state(key: str) -> dict:
+    if key not in _states:
+        _states[key] = {
+            "key": key,
+            "kind": key.split(":", 1)[0],
+            "state": CLOSED,
+            "score": 1.0,
+            "consecutive_failures": 0,
+            "total_failures": 0,
+            "total_successes": 0,
+            "open_until": None,
+            "last_error": None,
+            "last_success_at": None,
+            "last_failure_at": None,
+        }
+    return _states[key]
+
+
+def _persist(record: dict) -> None:
+    session = SessionLocal()
+    try:
+        values = dict(record)
+        session.execute(
+            insert(EndpointHealth)
+            .values(**values)
+            .on_conflict_do_update(index_elements=["key"], set_={k: v for k, v in values.items() if k != "key"})
+        )
+        session.commit()
+    except Exception as e:
+        logging.warning(f"Could not persist health of {record['key']}: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+def allow(key: str) -> bool:
+    """Whether a call to `key` may proceed now (may start a half-open probe)."""
+    if not BREAKER_ENABLED:
+        return True
+    with _lock:
+        _load()
+        st = _state(key)
+        if st["state"] == CLOSED:
+            return True
+        if key in _probing:
+            return False
+        open_until = st["open_until"]
+        if open_until and open_until.tzinfo is None:
+            open_until = open_until.replace(tzinfo=timezone.utc)
+        if st["state"] == OPEN and open_until and _now() < open_until:
+            return False
+        st["state"] = HALF_OPEN
+        _probing.add(key)
+        logging.info(f"Circuit for {key} half-open; probing")
+        return True
+
+
+def record_success(key: str) -> None:
+    if not BREAKER_ENABLED:
+        return
+    with _lock:
+        _load()
+        st = _state(key)
+        changed = st["state"] != CLOSED or st["consecutive_failures"] or st["score"] < 1.0
+        if st["state"] != CLOSED:
+            logging.info(f"Circuit for {key} closed again")
+        st.update(state=CLOSED, consecutive_failures=0, open_until=None, last_success_at=_now())
+        st["score"] = st["score"] * (1 - SCORE_ALPHA) + SCORE_ALPHA
+        st["total_successes"] += 1
+        _probing.discard(key)
+        record = dict(st)
+    # only write through when something worth showing changed
+    if changed:
+        _persist(record)
+
+
+def record_failure(key: str, error: str) -> None:
+    if not BREAKER_ENABLED:
+        return
+    with _lock:
+        _load()
+        st = _state(key)
+        st["consecutive_failures"] += 1
+        st["total_failures"] += 1
+        st["score"] = st["score"] * (1 - SCORE_ALPHA)
+        st["last_error"] = error[:1000]
+        st["last_failure_at"] = _now()
+        if st["state"] == HALF_OPEN or st["consecutive_failures"] >= BREAKER_FAILURES:
+            excess = max(0, st["consecutive_failures"] - BREAKER_FAILURES)
+            cooldown = min(BREAKER_COOLDOWN * (2 ** excess), BREAKER_MAX_COOLDOWN)
+            st["state"] = OPEN
+            st["open_until"] = _now() + timedelta(seconds=cooldown)
+            logging.warning(f"Circuit for {key} open for {cooldown}s after {st['consecutive_failures']} failures: {error}")
+        _probing.discard(key)
+        record = dict(st)
+    _persist(record)
+
+
+def reset(key: str) -> bool:
+    """Close a breaker manually. Returns False if `key` is unknown."""
+    with _lock:
+        _load(force=True)
+        if key not in _states:
+            return False
+        st = _states[key]
+        st.update(state=CLOSED, consecutive_failures=0, open_until=None, score=1.0)
+        _probing.discard(key)
+        record = dict(st)
+    _persist(record)
+    return True
+
+
+def endpoints(degraded_only: bool = False, kind: Optional[str] = None) -> List[dict]:
+    """Health of known endpoints, worst first."""
+    with _lock:
+        _load(force=True)
+        records = [dict(st) for st in _states.values()]
+    if kind:
+        records = [r for r in records if r["kind"] == kind]
+    if degraded_only:
+        records = [r for r in records if r["state"] != CLOSED or r["score"] < DEGRADED_SCORE]
+    for r in records:
+        for field in ("open_until", "last_success_at", "last_failure_at"):
+            r[field] = r[field].isoformat() if r[field] else None
+    return sorted(records, key=lambda r: (r["state"] == CLOSED, r["score"]))
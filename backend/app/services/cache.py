@@ -0,0 +1,46 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Small read-through cache for hot lookups (users, feeds, YAML config).
+# Entries expire after CACHE_TTL seconds; the API write endpoints invalidate
+# them explicitly so changes apply immediately in the API process. Other
+# processes (split roles, replicas) pick up changes within CACHE_TTL.
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", 60))
+
+
+class TTLCache:
+    """Thread-safe key/value cache with per-entry expiry."""
+
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value for `key`, calling `loader()` if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        value = loader()
+        with self._lock:
+            self._data[key] = (now + (self.ttl if ttl is None else ttl), value)
+        return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop `keys` (tuple keys are matched on their first element); no keys clears all."""
+        with self._lock:
+            if not keys:
+                self._data.clear()
+                return
+            for cached in list(self._data):
+                head = cached[0] if isinstance(cached, tuple) else cached
+                if cached in keys or head in keys:
+                    del self._data[cached]
+
+
+cache = TTLCache()
@@ -0,0 +1,142 @@
+import os
+import re
+import html
+import logging
+from html.parser import HTMLParser
+from typing import Optional
+
+# Content preprocessing for LLM input: strip HTML to plain text, drop common
+# feed boilerplate and truncate to a token budget. The cleaned text is cached
+# on Article.clean_summary so it is computed once per article.
+
+CONTENT_TOKEN_BUDGET = int(os.getenv("CONTENT_TOKEN_BUDGET", 1500))
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+
+# tags whose content is never article text
+_SKIP_TAGS = {"script", "style", "noscript", "iframe", "svg", "form", "button", "nav", "footer", "figure"}
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "tr", "section", "article"}
+
+_SOCIAL = r"(facebook|twitter|x|linkedin|reddit|instagram|threads|mastodon|bluesky|whatsapp|telegram|email)"
+_BOILERPLATE = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"^the post .+ appeared first on .+\.?$",
+        r"^(continue|read) (reading|more).*$",
+        # whole-line calls to action only; "Share prices fell..." is article text
+        rf"^share( this( article| story| post)?)?( on| via) {_SOCIAL}[.!:]?$",
+        r"^share( this( article| story| post)?)?[.!:]?$",
+        rf"^follow us( on {_SOCIAL}(,? (and|or) {_SOCIAL})*)?[.!:]?$",
+        r"^subscribe( now| today)?( to our (newsletter|podcast|channel|rss feed|feed))?[.!:]?$",
+        r"^sign up (for|to) our newsletter[.!:]?$",
+        r"^click here .*$",
+        r"^(image|photo) (credit|courtesy|source):.*$",
+        r"^advertisement$",
+        r"^\[?(…|\.\.\.)\]?$",
+    )
+]
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(raw: Optional[str]) -> str:
+    """Convert an HTML fragment to plain text, keeping paragraph breaks."""
+    if not raw:
+        return ""
+    if "<" not in raw:
+        return html.unescape(raw).strip()
+    parser = _TextExtractor()
+    try:
+        parser.feed(raw)
+        parser.close()
+    except Exception as e:
+        logging.warning(f"Could not parse HTML content, falling back to regex strip: {e}")
+        return re.sub(r"<[^>]+>", " ", raw).strip()
+    return "".join(parser.parts)
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop boilerplate lines and collapse whitespace."""
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t\u00a0]+", " ", line).strip()
+        if not line or any(p.match(line) for p in _BOILERPLATE):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+_encoder = None
+
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+
+            _encoder = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            logging.warning(f"tiktoken unavailable ({e}); approximating tokens by words")
+            _encoder = False
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or approximate by whitespace words."""
+    enc = _get_encoder()
+    if enc:
+        return len(enc.encode(text))
+    return len(text.split())
+
+
+def truncate_tokens(text: str, budget: int = CONTENT_TOKEN_BUDGET, suffix: str = "...") -> str:
+    """Truncate `text` to at most `budget` tokens, appending `suffix` if cut."""
+    if not text or budget <= 0:
+        return text or ""
+    enc = _get_encoder()
+    if enc:
+        tokens = enc.encode(text)
+        if len(tokens) <= budget:
+            return text
+        return enc.decode(tokens[:budget]).rstrip() + suffix
+    words = text.split()
+    if len(words) <= budget:
+        return text
+    return " ".join(words[:budget]) + suffix
+
+
+def clean_content(raw: Optional[str], budget: int = CONTENT_TOKEN_BUDGET) -> str:
+    """HTML -> text -> boilerplate removal -> token budget."""
+    return truncate_tokens(strip_boilerplate(html_to_text(raw)), budget)
+
+
+def prepare_article(article) -> str:
+    """Return the cleaned summary of an Article, computing and caching it if needed."""
+    if article.clean_summary is None:
+        article.clean_summary = clean_content(article.summary)
+    return article.clean_summary
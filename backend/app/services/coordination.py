@@ -0,0 +1,289 @@
+import os
+import uuid
+import bisect
+import socket
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import text, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal, engine
+from app.models.article import Article
+from app.models.worker import Worker
+
+# Coordination between backend replicas using only Postgres:
+#  - heartbeats in the `workers` table define the live worker set and the
+#    roles each worker runs,
+#  - feeds are sharded over live pollers with a consistent-hash ring, so a
+#    poller joining/leaving only moves ~1/N of the feeds,
+#  - a session-level advisory lock elects one leader among the scheduler
+#    processes for singleton jobs (plugins such as daily_summary, resuming
+#    replays),
+#  - articles are claimed (claimed_by/claimed_at, SELECT ... FOR UPDATE SKIP
+#    LOCKED) before summarization or dispatch so no two workers process the
+#    same row; stale claims of dead workers expire after CLAIM_TTL.
+# With CLUSTER_ENABLED unset, every helper degrades to single-process behaviour.
+
+CLUSTER_ENABLED = os.getenv("CLUSTER_ENABLED", "false").lower() in ("1", "true", "yes")
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+HEARTBEAT_INTERVAL = int(os.getenv("HEARTBEAT_INTERVAL", 15))
+# a worker without a heartbeat for this long is considered dead
+WORKER_TTL = int(os.getenv("WORKER_TTL", 60))
+CLAIM_TTL = int(os.getenv("CLAIM_TTL", 900))
+CLAIM_BATCH = int(os.getenv("CLAIM_BATCH", 200))
+VNODES = 64
+
+LEADER_LOCK = "rss_auto_reader:leader"
+# only processes running this role compete for leadership
+LEADER_ROLE = "scheduler"
+
+# background roles of this process, published with every heartbeat
+_roles: List[str] = []
+
+
+def set_roles(roles: List[str]) -> None:
+    global _roles
+    _roles = list(roles)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode()).digest()[:8], "big")
+
+
+def lock_key(name: str) -> int:
+    """Signed 64-bit advisory lock key for `name`."""
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes."""
+
+    def __init__(self, nodes: List[str], vnodes: int = VNODES):
+        self.ring = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self.keys = [h for h, _ in self.ring]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self.ring:
+            return None
+        idx = bisect.bisect(self.keys, _hash(key)) % len(self.ring)
+        return self.ring[idx][1]
+
+
+def heartbeat() -> None:
+    """Record this worker as alive and drop long-dead workers."""
+    session = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        session.execute(
+            insert(Worker)
+            .values(id=WORKER_ID, hostname=socket.gethostname(), roles=_roles, heartbeat_at=now)
+            .on_conflict_do_update(index_elements=["id"], set_={"heartbeat_at": now, "roles": _roles})
+        )
+        session.query(Worker).filter(Worker.heartbeat_at < now - timedelta(seconds=WORKER_TTL * 10)).delete()
+        session.commit()
+    finally:
+        session.close()
+
+
+def deregister() -> None:
+    """Remove this worker and its article claims so work is rebalanced immediately."""
+    if not CLUSTER_ENABLED:
+        return
+    session = SessionLocal()
+    try:
+        session.query(Worker).filter_by(id=WORKER_ID).delete()
+        session.query(Article).filter_by(claimed_by=WORKER_ID).update(
+            {"claimed_by": None, "claimed_at": None}, synchronize_session=False
+        )
+        session.commit()
+    finally:
+        session.close()
+    leader.release()
+
+
+def live_workers(session: Session, role: Optional[str] = None) -> List[str]:
+    """Ids of workers with a recent heartbeat (only those running `role` if given)."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=WORKER_TTL)
+    query = session.query(Worker.id).filter(Worker.heartbeat_at >= cutoff)
+    if role is not None:
+        query = query.filter(Worker.roles.contains([role]))
+    return [row[0] for row in query.all()]
+
+
+def owned_feeds(feeds: List[dict]) -> List[dict]:
+    """The subset of `feeds` this worker should poll."""
+    if not CLUSTER_ENABLED:
+        return feeds
+    session = SessionLocal()
+    try:
+        pollers = live_workers(session, role="poller")
+    finally:
+        session.close()
+    if WORKER_ID not in pollers:
+        pollers.append(WORKER_ID)
+    ring = HashRing(pollers)
+    mine = [f for f in feeds if ring.owner(f["name"]) == WORKER_ID]
+    logging.info(f"Worker {WORKER_ID} owns {len(mine)}/{len(feeds)} feeds across {len(pollers)} pollers")
+    return mine
+
+
+class LeaderLock:
+    """Leadership held as a session-level advisory lock on a dedicated connection."""
+
+    def __init__(self, name: str = LEADER_LOCK):
+        self.key = lock_key(name)
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Acquire or confirm leadership. Losing the connection loses the lock."""
+        with self.lock:
+            if self.conn is not None:
+                try:
+                    self.conn.execute(text("SELECT 1"))
+                    return True
+                except Exception:
+                    logging.warning(f"Worker {WORKER_ID} lost its leader connection")
+                    self._close()
+            conn = engine.connect()
+            try:
+                got = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": self.key}).scalar()
+                # advisory locks are session-scoped; end the implicit transaction, keep the session
+                conn.commit()
+            except Exception:
+                conn.close()
+                raise
+            if got:
+                self.conn = conn
+                logging.info(f"Worker {WORKER_ID} became leader")
+                return True
+            conn.close()
+            return False
+
+    def is_leader(self) -> bool:
+        return self.conn is not None
+
+    def _close(self) -> None:
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        self.conn = None
+
+    def release(self) -> None:
+        with self.lock:
+            if self.conn is None:
+                return
+            try:
+                self.conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+                self.conn.commit()
+            except Exception:
+                pass
+            self._close()
+
+
+leader = LeaderLock()
+
+
+def is_leader() -> bool:
+    """Whether this process should run singleton jobs."""
+    if not CLUSTER_ENABLED:
+        return True
+    if LEADER_ROLE not in _roles:
+        return False
+    return leader.try_acquire()
+
+
+@contextmanager
+def try_lock(name: str):
+    """
+    Yield whether the cluster-wide lock `name` was acquired; it is held on a
+    dedicated connection until the block ends, across the caller's commits.
+    """
+    if not CLUSTER_ENABLED:
+        yield True
+        return
+    key = lock_key(name)
+    conn = engine.connect()
+    try:
+        got = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": key}).scalar()
+        conn.commit()
+        try:
+            yield bool(got)
+        finally:
+            if got:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": key})
+                conn.commit()
+    finally:
+        conn.close()
+
+
+def heartbeat_tick() -> None:
+    heartbeat()
+    if LEADER_ROLE in _roles:
+        leader.try_acquire()
+
+
+def claim_articles(session: Session, *criteria, limit: int = CLAIM_BATCH, order_by=None) -> List[Article]:
+    """
+    Return articles matching `criteria` that this worker may process. In
+    cluster mode the rows are claimed atomically first.
+    """
+    query = session.query(Article).filter(*criteria)
+    if order_by is not None:
+        query = query.order_by(order_by)
+    if not CLUSTER_ENABLED:
+        return query.all()
+    stale = datetime.now(timezone.utc) - timedelta(seconds=CLAIM_TTL)
+    candidates = (
+        query.filter(
+            or_(Article.claimed_by.is_(None), Article.claimed_by == WORKER_ID, Article.claimed_at < stale)
+        )
+        .with_entities(Article.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    ids = [
+        row[0]
+        for row in session.execute(
+            Article.__table__.update()
+            .where(Article.id.in_(candidates.statement))
+            .values(claimed_by=WORKER_ID, claimed_at=datetime.now(timezone.utc))
+            .returning(Article.id)
+        )
+    ]
+    session.commit()
+    if not ids:
+        return []
+    query = session.query(Article).filter(Article.id.in_(ids))
+    if order_by is not None:
+        query = query.order_by(order_by)
+    return query.all()
+
+
+def release(article: Article) -> None:
+    """Drop this worker's claim (committed with the caller's next commit)."""
+    if CLUSTER_ENABLED:
+        article.claimed_by = None
+        article.claimed_at = None
+
+
+def cluster_status() -> dict:
+    session = SessionLocal()
+    try:
+        workers = live_workers(session) if CLUSTER_ENABLED else [WORKER_ID]
+    finally:
+        session.close()
+    return {
+        "enabled": CLUSTER_ENABLED,
+        "worker_id": WORKER_ID,
+        "leader": leader.is_leader() if CLUSTER_ENABLED else True,
+        "live_workers": workers,
+        "roles": _roles,
+    }
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Near-duplicate detection with MinHash signatures and an LSH band index.
+# Articles that describe the same event (e.g. the same wire story syndicated by
+# several feeds) are grouped so only one representative is summarized.
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "false").lower() in ("1", "true", "yes")
+# texts with fewer word shingles (e.g. title-only items) are never clustered:
+# their signatures are too coarse and unrelated short items would collide
+DEDUP_MIN_SHINGLES = int(os.getenv("DEDUP_MIN_SHINGLES", 20))
+# estimated Jaccard similarity above which two articles are near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.6))
+# only compare against representatives seen within this window
+DEDUP_WINDOW_HOURS = int(os.getenv("DEDUP_WINDOW_HOURS", 72))
+DEDUP_INDEX_PATH = os.getenv(
+    "DEDUP_INDEX_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "dedup_index.json")
+)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(0x5EED)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _shingles(text: str) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str, shingles: Optional[set] = None) -> List[int]:
+    """Compute a NUM_PERM MinHash signature over word shingles of `text`."""
+    shingles = _shingles(text) if shingles is None else shingles
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "big")
+        for s in shingles
+    ]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERM
+    return [min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """In-memory LSH index of representative signatures, persisted as JSON."""
+
+    def __init__(self, path: str = DEDUP_INDEX_PATH):
+        self.path = path
+        self.signatures: Dict[str, Tuple[float, List[int]]] = {}
+        self.buckets: Dict[Tuple[int, int], set] = defaultdict(set)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _bands(sig: List[int]):
+        for band in range(BANDS):
+            yield band, hash(tuple(sig[band * ROWS:(band + 1) * ROWS]))
+
+    def add(self, key: str, sig: List[int], ts: Optional[float] = None) -> None:
+        with self.lock:
+            self.signatures[key] = (ts or time.time(), sig)
+            for band in self._bands(sig):
+                self.buckets[band].add(key)
+
+    def query(self, sig: List[int], exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Return the most similar indexed key above the threshold, if any."""
+        with self.lock:
+            candidates = set()
+            for band in self._bands(sig):
+                candidates |= self.buckets.get(band, set())
+            candidates.discard(exclude)
+            best = None
+            for key in candidates:
+                sim = similarity(sig, self.signatures[key][1])
+                if sim >= DEDUP_THRESHOLD and (best is None or sim > best[1]):
+                    best = (key, sim)
+        return best
+
+    def expire(self, max_age: float = DEDUP_WINDOW_HOURS * 3600) -> None:
+        cutoff = time.time() - max_age
+        with self.lock:
+            stale = [k for k, (ts, _) in self.signatures.items() if ts < cutoff]
+            if not stale:
+                return
+            for key in stale:
+                _, sig = self.signatures.pop(key)
+                for band in self._bands(sig):
+                    self.buckets[band].discard(key)
+
+    def save(self) -> None:
+        with self.lock:
+            data = {k: [ts, sig] for k, (ts, sig) in self.signatures.items()}
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning(f"Could not persist near-duplicate index to {self.path}: {e}")
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not load near-duplicate index from {self.path}: {e}")
+            return
+        for key, (ts, sig) in data.items():
+            self.add(key, sig, ts)
+        self.expire()
+
+
+_index: Optional[NearDuplicateIndex] = None
+
+
+def get_index() -> NearDuplicateIndex:
+    global _index
+    if _index is None:
+        _index = NearDuplicateIndex()
+        _index.load()
+    return _index
+
+
+def article_text(article) -> str:
+    return f"{article.title or ''}\n{article.clean_summary or article.summary or ''}"
+
+
+def _signature(article) -> Optional[List[int]]:
+    """MinHash of `article`, or None if its text is too short to compare."""
+    shingles = _shingles(article_text(article))
+    if len(shingles) < DEDUP_MIN_SHINGLES:
+        return None
+    return minhash("", shingles)
+
+
+def find_representative(article) -> Optional[str]:
+    """Return the link of an indexed near-duplicate of `article`, if any."""
+    sig = _signature(article)
+    if sig is None:
+        return None
+    match = get_index().query(sig, exclude=article.link)
+    if match:
+        logging.info(f"Article {article.link} is a near-duplicate of {match[0]} (similarity {match[1]:.2f})")
+        return match[0]
+    return None
+
+
+def index_article(article) -> None:
+    """Register a summarized article as a cluster representative."""
+    sig = _signature(article)
+    if sig is not None:
+        get_index().add(article.link, sig)
@@ -0,0 +1,177 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, undefer
+
+from app.models.article import Article
+from app.models.user import User
+from app.services.tracing import span
+from app.services.cache import cache
+
+# Optional embeddings path for recipient selection. User interests and articles
+# are embedded once and stored as float32 blobs; articles are scored against
+# all users with a single matrix product. Mode (llm.yml `embeddings_mode`):
+#   off       - recipients chosen by the LLM only (default)
+#   prefilter - only users above their threshold are offered to the LLM
+#   replace   - recipients are the users above their threshold
+
+
+def _embeddings_config() -> dict:
+    from app.core import load_llm_config
+
+    cfg = load_llm_config()
+    return {
+        "mode": cfg.get("embeddings_mode", os.getenv("EMBEDDINGS_MODE", "off")),
+        # 'openai' (any OpenAI-compatible /embeddings endpoint) or 'local' (sentence-transformers on CPU)
+        "backend": cfg.get("embeddings_backend", os.getenv("EMBEDDINGS_BACKEND", "openai")),
+        "model": cfg.get("embeddings_model", os.getenv("EMBEDDINGS_MODEL", "text-embedding-3-small")),
+        "api_base": cfg.get("embeddings_api_base")
+        or cfg.get("openai_api_base")
+        or os.getenv("OPENAI_API_BASE"),
+        "threshold": float(cfg.get("embeddings_threshold", os.getenv("EMBEDDINGS_THRESHOLD", 0.35))),
+    }
+
+
+def embeddings_mode() -> str:
+    return _embeddings_config()["mode"]
+
+
+_local_models: Dict[str, object] = {}
+
+
+def embed_texts(texts: Sequence[str]) -> np.ndarray:
+    """Embed `texts` and return an L2-normalized (n, d) float32 matrix."""
+    cfg = _embeddings_config()
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    with span("embeddings.embed", backend=cfg["backend"], model=cfg["model"], count=len(texts)):
+        if cfg["backend"] == "local":
+            from sentence_transformers import SentenceTransformer
+
+            model = _local_models.get(cfg["model"])
+            if model is None:
+                model = _local_models[cfg["model"]] = SentenceTransformer(cfg["model"], device="cpu")
+            vectors = np.asarray(model.encode(list(texts)), dtype=np.float32)
+        else:
+            from openai import OpenAI
+
+            client = OpenAI(base_url=cfg["api_base"]) if cfg["api_base"] else OpenAI()
+            resp = client.embeddings.create(model=cfg["model"], input=list(texts))
+            vectors = np.asarray([d.embedding for d in resp.data], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def to_blob(vectors: np.ndarray) -> bytes:
+    return np.ascontiguousarray(vectors, dtype=np.float32).tobytes()
+
+
+def from_blob(blob: bytes, dim: int) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32).reshape(-1, dim)
+
+
+def model_key() -> str:
+    """Identifies the embedding space; vectors of different keys are not comparable."""
+    cfg = _embeddings_config()
+    return f"{cfg['backend']}:{cfg['model']}"
+
+
+def _interests_hash(interests: List[str]) -> str:
+    cfg = _embeddings_config()
+    key = json.dumps([cfg["backend"], cfg["model"], sorted(interests or [])])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def refresh_user_embeddings(session: Session) -> List[User]:
+    """(Re-)embed interests of users whose interests or model changed."""
+    users = session.query(User).all()
+    stale = [u for u in users if u.interests and u.interests_hash != _interests_hash(u.interests)]
+    if stale:
+        texts = [i for u in stale for i in u.interests]
+        vectors = embed_texts(texts)
+        pos = 0
+        for u in stale:
+            n = len(u.interests)
+            u.interests_embedding = to_blob(vectors[pos:pos + n])
+            u.embedding_dim = vectors.shape[1]
+            u.interests_hash = _interests_hash(u.interests)
+            pos += n
+        session.commit()
+        cache.invalidate("users")
+        logging.info(f"Re-embedded interests for {len(stale)} users")
+    return users
+
+
+def embed_articles(session: Session, articles: List) -> None:
+    """Embed articles that have no stored vector yet (one batched request)."""
+    if not articles:
+        return
+    # embedding is a deferred column: load it for the whole batch in one query
+    session.query(Article).options(undefer(Article.embedding)).filter(
+        Article.id.in_([a.id for a in articles])
+    ).all()
+    key = model_key()
+    missing = [a for a in articles if a.embedding is None or a.embedding_model != key]
+    if not missing:
+        return
+    texts = [f"{a.title or ''}\n{a.clean_summary or a.summary or ''}" for a in missing]
+    vectors = embed_texts(texts)
+    for art, vec in zip(missing, vectors):
+        art.embedding = to_blob(vec)
+        art.embedding_model = key
+    session.commit()
+
+
+class InterestMatcher:
+    """Scores article vectors against every user's interest vectors at once."""
+
+    def __init__(self, users: List[User], default_threshold: float, model: Optional[str] = None):
+        self.model = model
+        rows, owners, names, thresholds = [], [], [], []
+        for u in users:
+            if not u.interests_embedding or not u.embedding_dim:
+                continue
+            vecs = from_blob(u.interests_embedding, u.embedding_dim)
+            rows.append(vecs)
+            owners.extend([len(names)] * len(vecs))
+            names.append(u.username)
+            thresholds.append(u.match_threshold if u.match_threshold is not None else default_threshold)
+        self.usernames = names
+        self.thresholds = np.asarray(thresholds, dtype=np.float32)
+        self.matrix = np.vstack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+        self.owners = np.asarray(owners, dtype=np.int64)
+
+    def scores(self, article_vec: np.ndarray) -> np.ndarray:
+        """Best cosine similarity per user (max over that user's interests)."""
+        if not self.usernames:
+            return np.zeros(0, dtype=np.float32)
+        sims = self.matrix @ article_vec
+        best = np.full(len(self.usernames), -1.0, dtype=np.float32)
+        np.maximum.at(best, self.owners, sims)
+        return best
+
+    def match(self, article_blob: Optional[bytes], model: Optional[str] = None) -> Optional[List[Tuple[str, float]]]:
+        """
+        Users whose best interest similarity passes their threshold, or None
+        if the article has no vector comparable to the users' (missing, other
+        model or dimension); callers then fall back to LLM selection.
+        """
+        if article_blob is None or not self.usernames:
+            return None
+        if self.model and model and model != self.model:
+            return None
+        vec = np.frombuffer(article_blob, dtype=np.float32)
+        if vec.shape[0] != self.matrix.shape[1]:
+            return None
+        best = self.scores(vec)
+        hits = np.nonzero(best >= self.thresholds)[0]
+        return sorted(((self.usernames[i], float(best[i])) for i in hits), key=lambda x: -x[1])
+
+
+def build_matcher(session: Session) -> InterestMatcher:
+    users = refresh_user_embeddings(session)
+    return InterestMatcher(users, _embeddings_config()["threshold"], model_key())
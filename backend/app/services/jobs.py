@@ -0,0 +1,133 @@
+import os
+import uuid
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+# Background jobs for on-demand work triggered through the API (fetch,
+# dispatch). A request enqueues a job and returns its id right away; the job
+# runs on a small thread pool and reports progress that clients poll via
+# GET /api/jobs/{id}. Jobs live in memory only: they are a convenience for
+# the admin UI, the periodic loops do the durable work.
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# finished jobs kept for status polling
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", 100))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_current: contextvars.ContextVar = contextvars.ContextVar("current_job", default=None)
+
+
+class Job:
+    def __init__(self, kind: str, params: Optional[dict] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.state = QUEUED
+        self.progress: dict = {}
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.state in (QUEUED, RUNNING)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            progress = dict(self.progress)
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "state": self.state,
+            "progress": progress,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobManager:
+    """Runs jobs on a thread pool and keeps their status for polling."""
+
+    def __init__(self, workers: int = JOB_WORKERS, history: int = JOB_HISTORY):
+        self.history = history
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    def submit(self, kind: str, fn: Callable, params: Optional[dict] = None) -> Job:
+        """
+        Enqueue `fn()` as a job. An identical job (same kind and params) that
+        is still queued or running is returned instead of starting another.
+        """
+        params = params or {}
+        with self.lock:
+            for job in self.jobs.values():
+                if job.active and job.kind == kind and job.params == params:
+                    return job
+            job = Job(kind, params)
+            self.jobs[job.id] = job
+            self._trim()
+        self.pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable) -> None:
+        job.state = RUNNING
+        job.started_at = datetime.now(timezone.utc)
+        token = _current.set(job)
+        try:
+            fn()
+            job.state = DONE
+        except Exception as e:
+            logging.error(f"Job {job.kind} {job.id} failed: {e}")
+            job.error = str(e)
+            job.state = FAILED
+        finally:
+            _current.reset(token)
+            job.finished_at = datetime.now(timezone.utc)
+
+    def _trim(self) -> None:
+        finished = [j.id for j in self.jobs.values() if not j.active]
+        for job_id in finished[: max(0, len(self.jobs) - self.history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self, limit: int = 20) -> List[dict]:
+        with self.lock:
+            recent = list(self.jobs.values())[-limit:]
+        return [j.to_dict() for j in reversed(recent)]
+
+    def shutdown(self) -> None:
+        """Drop queued jobs; running ones stop at their next stopping() check."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+jobs = JobManager()
+
+
+def report(**progress) -> None:
+    """Update the progress of the job running in this context (no-op outside jobs)."""
+    job = _current.get()
+    if job is not None:
+        with job.lock:
+            job.progress.update(progress)
+
+
+def advance(field: str = "done", step: int = 1) -> None:
+    """Increment a progress counter of the job running in this context."""
+    job = _current.get()
+    if job is not None:
+        with job.lock:
+            job.progress[field] = job.progress.get(field, 0) + step
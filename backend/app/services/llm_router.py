@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services import breaker
+from app.services.tracing import span
+
+# Routing of LLM calls over several OpenAI-compatible endpoints ("routes").
+# llm.yml may list routes; without them the top-level model_name /
+# openai_api_base / ... form the single default route:
+#
+#   routes:
+#     - name: local                 # fast local model for short items
+#       model_name: qwen2.5:7b
+#       openai_api_base: http://host.docker.internal:11434/v1
+#       max_input_tokens: 1500      # only used for inputs up to this size
+#       timeout: 60
+#     - name: hosted
+#       model_name: gpt-4.1
+#       cost_per_1k_tokens: 0.002   # tie-breaker between similar routes
+#   hedge_after: 15                 # seconds before a backup request is sent (0: off)
+#
+# Routes that accept the input size are ranked by observed latency, error rate
+# and cost. The call goes to the best route; on error it fails over to the next.
+# If the first route has not answered after `hedge_after` seconds, the next one
+# is started too and the first answer wins. Each route has a circuit breaker
+# ("llm:<name>", see app.services.breaker), so a route that keeps failing is
+# skipped until its cool-down ends. stream() yields partial results instead;
+# it fails over only until the first chunk arrives and is never hedged.
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 120))
+# ChatOpenAI's default, used when there is no other route to fail over to
+CLIENT_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+# weight of the latest call in the latency / error-rate averages
+STATS_ALPHA = 0.2
+# an error counts like this many seconds of extra latency when ranking
+ERROR_PENALTY = 30.0
+
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", 8)), thread_name_prefix="llm")
+_clients: Dict[str, Any] = {}
+_stats: Dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+class NoRouteAvailable(Exception):
+    """Raised when every route is open or failed."""
+
+
+def _config() -> dict:
+    from app.core import load_llm_config
+
+    return load_llm_config()
+
+
+def routes(cfg: Optional[dict] = None) -> List[dict]:
+    """Configured routes, or the single default route from the top-level keys."""
+    cfg = _config() if cfg is None else cfg
+    if cfg.get("routes"):
+        return [
+            dict(r, name=r.get("name") or r.get("model_name") or f"route-{i}")
+            for i, r in enumerate(cfg["routes"], 1)
+        ]
+    return [{
+        "name": "default",
+        "model_name": cfg.get("model_name", os.getenv("MODEL_NAME", "gpt-4.1")),
+        "model_temperature": cfg.get("model_temperature", os.getenv("MODEL_TEMPERATURE", 0.5)),
+        "model_max_tokens": cfg.get("model_max_tokens", os.getenv("MODEL_MAX_TOKENS", 4096)),
+        "openai_api_base": cfg.get("openai_api_base") or os.getenv("OPENAI_API_BASE"),
+    }]
+
+
+def _client(route: dict, defaults: dict):
+    """A ChatOpenAI instance for `route`, cached per configuration."""
+    # with several routes the router does the failing over, so the client
+    # does not retry; a single route keeps the client's own retries
+    retries = int(route.get("max_retries", 0 if len(routes(defaults)) > 1 else CLIENT_RETRIES))
+    key = json.dumps([route, retries], sort_keys=True, default=str)
+    client = _clients.get(key)
+    if client is None:
+        from langchain_openai import ChatOpenAI
+
+        kwargs = {
+            "model_name": route.get("model_name") or defaults.get("model_name", os.getenv("MODEL_NAME", "gpt-4.1")),
+            "temperature": float(route.get("model_temperature", defaults.get("model_temperature", 0.5))),
+            "timeout": float(route.get("timeout", LLM_TIMEOUT)),
+            "max_retries": retries,
+        }
+        max_tokens = int(route.get("model_max_tokens", defaults.get("model_max_tokens", 0)) or 0)
+        if max_tokens:
+            kwargs["max_tokens"] = max_tokens
+        if route.get("openai_api_base"):
+            kwargs["openai_api_base"] = route["openai_api_base"]
+        if route.get("api_key_env"):
+            kwargs["openai_api_key"] = os.getenv(route["api_key_env"])
+        client = _clients[key] = ChatOpenAI(**kwargs)
+    return client
+
+
+def _new_stats() -> dict:
+    return {
+        "requests": 0,
+        "errors": 0,
+        "hedged": 0,
+        "wins": 0,
+        "latency_ewma": None,
+        "error_rate": 0.0,
+        "last_error": None,
+    }
+
+
+def _route_stats(name: str) -> dict:
+    """Stats of route `name`; call with _lock held."""
+    if name not in _stats:
+        _stats[name] = _new_stats()
+    return _stats[name]
+
+
+def _record(name: str, latency: Optional[float], error: Optional[str] = None) -> None:
+    with _lock:
+        st = _route_stats(name)
+        st["requests"] += 1
+        st["error_rate"] = st["error_rate"] * (1 - STATS_ALPHA) + (STATS_ALPHA if error else 0.0)
+        if error:
+            st["errors"] += 1
+            st["last_error"] = error[:500]
+        elif latency is not None:
+            prev = st["latency_ewma"]
+            st["latency_ewma"] = latency if prev is None else prev * (1 - STATS_ALPHA) + latency * STATS_ALPHA
+
+
+def _rank(candidates: List[dict], input_tokens: int) -> List[dict]:
+    def score(route):
+        st = _stats.get(route["name"]) or {}
+        # untried routes rank first so every route gets measured
+        latency = st.get("latency_ewma") or 0.0
+        cost = float(route.get("cost_per_1k_tokens", 0)) * input_tokens / 1000
+        return latency + ERROR_PENALTY * st.get("error_rate", 0.0) + cost * 100
+
+    return sorted(candidates, key=score)
+
+
+def select_routes(input_tokens: int = 0, cfg: Optional[dict] = None) -> List[dict]:
+    """Routes that accept `input_tokens`, best first (all routes if none fits)."""
+    all_routes = routes(cfg)
+    fitting = [
+        r for r in all_routes
+        if input_tokens >= int(r.get("min_input_tokens", 0))
+        and (not r.get("max_input_tokens") or input_tokens <= int(r["max_input_tokens"]))
+    ]
+    return _rank(fitting or all_routes, input_tokens)
+
+
+def _call(route: dict, defaults: dict, messages, structured):
+    key = f"llm:{route['name']}"
+    start = time.monotonic()
+    try:
+        with span("llm.route", route=route["name"], model=route.get("model_name")):
+            llm = _client(route, defaults)
+            if structured is not None:
+                llm = llm.with_structured_output(structured)
+            result = llm.invoke(messages)
+    except Exception as e:
+        _record(route["name"], None, str(e))
+        breaker.record_failure(key, str(e))
+        raise
+    _record(route["name"], time.monotonic() - start)
+    breaker.record_success(key)
+    return result
+
+
+def invoke(messages, structured=None, input_tokens: int = 0):
+    """
+    Run `messages` (optionally with structured output of the given pydantic
+    model) on the best available route, failing over and hedging as configured.
+    """
+    cfg = _config()
+    hedge_after = float(cfg.get("hedge_after", os.getenv("LLM_HEDGE_AFTER", 0)) or 0)
+    candidates = select_routes(input_tokens, cfg)
+    errors = []
+    pending = {}
+
+    def start_next():
+        while candidates:
+            route = candidates.pop(0)
+            if breaker.allow(f"llm:{route['name']}"):
+                pending[_pool.submit(contextvars.copy_context().run, _call, route, cfg, messages, structured)] = route
+                return True
+        return False
+
+    if not start_next():
+        raise NoRouteAvailable("all LLM routes are cooling down")
+    while pending:
+        # at most one backup request per call
+        timeout = hedge_after if hedge_after and candidates and len(pending) == 1 else None
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            # slow answer: send a backup request and take whichever comes first
+            if start_next():
+                with _lock:
+                    _route_stats(list(pending.values())[-1]["name"])["hedged"] += 1
+            continue
+        for future in done:
+            route = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.warning(f"LLM route {route['name']} failed: {e}")
+                errors.append(f"{route['name']}: {e}")
+                continue
+            with _lock:
+                _route_stats(route["name"])["wins"] += 1
+            # a still running hedge finishes in the background; its result is dropped
+            return result
+        if not pending:
+            start_next()
+    raise NoRouteAvailable("; ".join(errors) or "no LLM route available")
+
+
+def stream(messages, schema: Optional[dict] = None, input_tokens: int = 0) -> Iterator:
+    """
+    Stream `messages` from the best available route. With a JSON `schema`
+    each item is the partial structured answer parsed so far (a dict).
+    """
+    cfg = _config()
+    errors = []
+    for route in select_routes(input_tokens, cfg):
+        key = f"llm:{route['name']}"
+        if not breaker.allow(key):
+            continue
+        start = time.monotonic()
+        started = False
+        try:
+            with span("llm.route", route=route["name"], model=route.get("model_name"), streaming=True):
+                llm = _client(route, cfg)
+                if schema is not None:
+                    llm = llm.with_structured_output(schema, method="json_schema")
+                for chunk in llm.stream(messages):
+                    started = True
+                    yield chunk
+        except Exception as e:
+            _record(route["name"], None, str(e))
+            breaker.record_failure(key, str(e))
+            if started:
+                # part of the answer was already consumed; a retry would repeat it
+                raise
+            logging.warning(f"LLM route {route['name']} failed: {e}")
+            errors.append(f"{route['name']}: {e}")
+            continue
+        _record(route["name"], time.monotonic() - start)
+        breaker.record_success(key)
+        with _lock:
+            _route_stats(route["name"])["wins"] += 1
+        return
+    raise NoRouteAvailable("; ".join(errors) or "all LLM routes are cooling down")
+
+
+def stats() -> List[dict]:
+    """Per-route configuration summary and observed statistics."""
+    with _lock:
+        snapshot = {name: dict(st) for name, st in _stats.items()}
+    out = []
+    for route in routes():
+        st = snapshot.get(route["name"]) or _new_stats()
+        latency = st.get("latency_ewma")
+        out.append({
+            "name": route["name"],
+            "model_name": route.get("model_name"),
+            "openai_api_base": route.get("openai_api_base"),
+            "requests": st["requests"],
+            "errors": st["errors"],
+            "error_rate": round(st["error_rate"], 3),
+            "latency_ms": round(latency * 1000) if latency is not None else None,
+            "hedged": st["hedged"],
+            "wins": st["wins"],
+            "last_error": st["last_error"],
+        })
+    return out
@@ -0,0 +1,135 @@
+import os
+import time
+import logging
+from typing import List, Optional
+
+import requests
+
+from app.services import breaker
+from app.services.tracing import span
+
+# Webhook payload helpers: split long Markdown messages into chunks that fit a
+# maximum payload size (on paragraph, then line, then word boundaries) and post
+# them in order. post_message / edit_message serve the streaming path (see
+# app.services.streaming).
+
+WEBHOOK_MAX_CHARS = int(os.getenv("WEBHOOK_MAX_CHARS", 8000))
+WEBHOOK_TIMEOUT = int(os.getenv("WEBHOOK_TIMEOUT", 30))
+# pause between consecutive posts to the same webhook
+WEBHOOK_PAUSE = float(os.getenv("WEBHOOK_PAUSE", 1))
+
+
+def _split(text: str, limit: int, separators=("\n\n", "\n", " ")) -> List[str]:
+    if len(text) <= limit:
+        return [text]
+    if not separators:
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+    sep, rest = separators[0], separators[1:]
+    pieces, current = [], ""
+    for part in text.split(sep):
+        candidate = f"{current}{sep}{part}" if current else part
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if len(part) <= limit:
+            current = part
+        else:
+            sub = _split(part, limit, rest)
+            pieces.extend(sub[:-1])
+            current = sub[-1]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_message(
+    text: str,
+    max_chars: Optional[int] = None,
+    header: str = "",
+    continued_header: Optional[str] = None,
+) -> List[str]:
+    """
+    Split `text` into messages of at most `max_chars` characters, each
+    prefixed with `header` (first) or `continued_header` (following ones).
+    """
+    max_chars = max_chars or WEBHOOK_MAX_CHARS
+    continued_header = header if continued_header is None else continued_header
+    budget = max(1, max_chars - max(len(header), len(continued_header)))
+    parts = _split(text.strip(), budget)
+    return [f"{header if i == 0 else continued_header}{part}" for i, part in enumerate(parts)]
+
+
+def _host_failure(error: Exception) -> bool:
+    """Whether `error` counts against the webhook host (4xx other than 429 is the request's fault)."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def _check(key: str) -> None:
+    if not breaker.allow(key):
+        raise breaker.CircuitOpen(f"circuit open for {key}")
+
+
+def _send(key: str, method: str, url: str, text: str, timeout: int, params=None, **attributes) -> requests.Response:
+    """Send one {"ai_summary": text} message, recording the outcome against the host's breaker."""
+    try:
+        with span("webhook.post", method=method, **attributes) as sp:
+            response = requests.request(method, url, json={"ai_summary": text}, params=params, timeout=timeout)
+            sp.set_attribute("status_code", response.status_code)
+        response.raise_for_status()
+    except Exception as e:
+        if _host_failure(e):
+            breaker.record_failure(key, str(e))
+        else:
+            # the host answered; the request itself was rejected
+            breaker.record_success(key)
+        raise
+    return response
+
+
+def post_chunks(url: str, chunks: List[str], timeout: int = WEBHOOK_TIMEOUT, **attributes) -> None:
+    """
+    POST each chunk as {"ai_summary": chunk}; raises on the first failure,
+    or breaker.CircuitOpen without posting if the webhook host is cooling down.
+    """
+    key = breaker.webhook_key(url)
+    _check(key)
+    for i, chunk in enumerate(chunks):
+        if i:
+            time.sleep(WEBHOOK_PAUSE)
+        _send(key, "POST", url, chunk, timeout, chunk=i, chunks=len(chunks), **attributes)
+    breaker.record_success(key)
+    logging.debug(f"Posted {len(chunks)} chunk(s) to webhook")
+
+
+# Message updates follow the Discord webhook convention: a POST with
+# ?wait=true answers with the created message, which can later be changed
+# with PATCH <webhook>/messages/<id>. Targets that do not return an id get
+# no edits.
+
+def post_message(url: str, text: str, timeout: int = WEBHOOK_TIMEOUT, **attributes) -> Optional[str]:
+    """POST one message and return its id if the target reports one."""
+    key = breaker.webhook_key(url)
+    _check(key)
+    response = _send(key, "POST", url, text, timeout, params={"wait": "true"}, **attributes)
+    breaker.record_success(key)
+    try:
+        data = response.json()
+    except ValueError:
+        return None
+    message_id = data.get("id") if isinstance(data, dict) else None
+    return str(message_id) if message_id is not None else None
+
+
+def edit_message(url: str, message_id: str, text: str, timeout: int = WEBHOOK_TIMEOUT, **attributes) -> None:
+    """Replace the content of message `message_id` posted by post_message."""
+    key = breaker.webhook_key(url)
+    _check(key)
+    base, _, query = url.partition("?")
+    target = f"{base.rstrip('/')}/messages/{message_id}" + (f"?{query}" if query else "")
+    _send(key, "PATCH", target, text, timeout, **attributes)
+    breaker.record_success(key)
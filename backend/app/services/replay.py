@@ -0,0 +1,287 @@
+import os
+import time
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models.article import Article, ArticleStatus
+from app.models.replay import Replay
+from app.services import coordination
+from app.services.jobs import JobManager, report, advance
+from app.services.supervisor import stopping
+from app.services.tracing import span
+
+# Replays re-run summarization and/or dispatch over already ingested articles,
+# e.g. after changing the model or prompt in llm.yml, or to deliver a day's
+# articles to a newly added user. Articles are selected by feed, ingestion
+# date (created_at) and status, and handled in id order in chunks of
+# `chunk_size` through the same code as live traffic (_summarize_one,
+# _dispatch_one). To leave room for live traffic, a replay waits while the live
+# queues have work (up to REPLAY_MAX_YIELD seconds) and pauses `pause` seconds
+# between chunks. Progress (the id of the last handled article) is stored in
+# the `replays` table after every article, so an interrupted replay continues
+# where it stopped: running replays are resumed at startup.
+
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", 1))
+REPLAY_CHUNK = int(os.getenv("REPLAY_CHUNK", 20))
+REPLAY_PAUSE = int(os.getenv("REPLAY_PAUSE", 30))
+# longest wait for the live queues to drain before the next chunk goes anyway
+REPLAY_MAX_YIELD = int(os.getenv("REPLAY_MAX_YIELD", 600))
+YIELD_CHECK = 10
+
+PENDING, RUNNING, PAUSED, COMPLETED, FAILED, CANCELLED = (
+    "pending", "running", "paused", "completed", "failed", "cancelled"
+)
+
+# separate from the on-demand jobs so a long replay never blocks a manual fetch
+runner = JobManager(workers=REPLAY_WORKERS)
+
+
+def _criteria(replay: Replay) -> list:
+    criteria = [Article.batch_id.is_(None)]
+    if replay.feed_name:
+        criteria.append(Article.feed_name == replay.feed_name)
+    if replay.since:
+        criteria.append(Article.created_at >= replay.since)
+    if replay.until:
+        criteria.append(Article.created_at < replay.until)
+    if replay.status:
+        criteria.append(Article.status == ArticleStatus(replay.status))
+    return criteria
+
+
+def create(
+    session: Session,
+    feed_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    summarize: bool = False,
+    dispatch: bool = False,
+    users: Optional[List[str]] = None,
+    chunk_size: Optional[int] = None,
+    pause: Optional[int] = None,
+) -> Replay:
+    """Record a new replay and count the articles it selects."""
+    if not (summarize or dispatch):
+        raise ValueError("a replay must re-run summarization, dispatch or both")
+    if status is not None and status not in ArticleStatus.__members__:
+        raise ValueError(f"unknown article status '{status}'")
+    replay = Replay(
+        feed_name=feed_name,
+        since=since,
+        until=until,
+        status=status,
+        summarize=summarize,
+        dispatch=dispatch,
+        users=users or None,
+        chunk_size=max(1, chunk_size or REPLAY_CHUNK),
+        pause=REPLAY_PAUSE if pause is None else max(0, pause),
+        state=PENDING,
+    )
+    session.add(replay)
+    session.flush()
+    replay.total = session.query(Article).filter(*_criteria(replay)).count()
+    session.commit()
+    logging.info(f"Created replay {replay.id} over {replay.total} articles")
+    return replay
+
+
+def _sleep(seconds: float) -> None:
+    """Sleep, waking up early on shutdown."""
+    end = time.monotonic() + seconds
+    while not stopping() and time.monotonic() < end:
+        time.sleep(min(1.0, end - time.monotonic()))
+
+
+def _live_backlog(session: Session, replay: Replay) -> int:
+    backlog = 0
+    if replay.summarize:
+        backlog += session.query(Article).filter(
+            Article.status == ArticleStatus.new, Article.batch_id.is_(None)
+        ).count()
+    if replay.dispatch:
+        backlog += session.query(Article).filter(
+            Article.status == ArticleStatus.summarized, Article.sent == False  # noqa: E712
+        ).count()
+    return backlog
+
+
+def _yield_to_live(session: Session, replay: Replay) -> None:
+    waited = 0
+    while waited < REPLAY_MAX_YIELD and not stopping():
+        if not _live_backlog(session, replay):
+            return
+        report(phase="waiting for live queue")
+        _sleep(YIELD_CHECK)
+        waited += YIELD_CHECK
+    report(phase="replaying")
+
+
+def _handle(session: Session, replay: Replay, art: Article, user_data: list, matcher=None, mode: str = "off") -> bool:
+    from app.core import _summarize_one, _dispatch_one
+
+    if replay.summarize and not _summarize_one(session, art, user_data, matcher, mode, live=False):
+        return False
+    if not replay.dispatch or art.status == ArticleStatus.new:
+        return True
+    recipients = set(art.recipients or [])
+    if replay.users is None:
+        targets = recipients
+    elif replay.summarize:
+        # re-summarized: named users get the article if it matched their interests
+        targets = recipients & set(replay.users)
+    else:
+        # dispatch only: named users (e.g. a newly added one) get it as given
+        targets = set(replay.users)
+        art.recipients = sorted(recipients | targets)
+    if not targets:
+        return True
+    delivered = set(art.delivered or []) - targets
+    if art.status == ArticleStatus.sent:
+        # the other recipients of an already sent article have it; never re-queue them
+        delivered |= recipients - targets
+    # forget earlier deliveries to the targets so they get the article again
+    art.delivered = sorted(delivered) or None
+    session.commit()
+    # posted directly: a coalescing window would leave the replay waiting on the live
+    # dispatcher; failed deliveries put the article back in the live dispatch queue
+    return _dispatch_one(session, art, only=targets, coalesce=False)
+
+
+def run(replay_id: int) -> None:
+    """Work through a replay from its cursor until done, paused, cancelled or shut down."""
+    from app.core import load_users, _build_matcher
+
+    session = SessionLocal()
+    try:
+        replay = session.get(Replay, replay_id)
+        if replay is None or replay.state in (COMPLETED, CANCELLED):
+            return
+        replay.state = RUNNING
+        replay.error = None
+        session.commit()
+        users = load_users()
+        user_data = [{"username": u.username, "interests": u.interests or []} for u in users]
+        report(replay=replay.id, phase="replaying", total=replay.total, done=replay.processed)
+        logging.info(f"Running replay {replay.id} from article id {replay.cursor}")
+        while not stopping():
+            session.refresh(replay)
+            if replay.state != RUNNING:
+                logging.info(f"Replay {replay.id} {replay.state}")
+                return
+            _yield_to_live(session, replay)
+            ids = [
+                row[0]
+                for row in session.query(Article.id)
+                .filter(*_criteria(replay), Article.id > replay.cursor)
+                .order_by(Article.id)
+                .limit(replay.chunk_size)
+            ]
+            if not ids:
+                replay.state = COMPLETED
+                replay.finished_at = datetime.now(timezone.utc)
+                session.commit()
+                logging.info(
+                    f"Replay {replay.id} completed: {replay.processed} processed, "
+                    f"{replay.failed} failed, {replay.skipped} skipped"
+                )
+                return
+            # in cluster mode, articles a live worker is holding are skipped
+            claimed = {a.id: a for a in coordination.claim_articles(session, Article.id.in_(ids), order_by=Article.id)}
+            # same recipient selection as live summarization
+            matcher, mode = _build_matcher(session, list(claimed.values())) if replay.summarize else (None, "off")
+            for article_id in ids:
+                if stopping():
+                    # state stays 'running' so the replay resumes at the next startup
+                    return
+                art = claimed.get(article_id)
+                if art is None:
+                    replay.skipped += 1
+                else:
+                    try:
+                        with span("replay.article", replay=replay.id, link=art.link):
+                            ok = _handle(session, replay, art, user_data, matcher, mode)
+                    except Exception as e:
+                        logging.warning(f"Replay {replay.id} failed on {art.link}: {e}")
+                        session.rollback()
+                        ok = False
+                    coordination.release(art)
+                    if stopping():
+                        # interrupted mid-article: handle it again on resume
+                        session.commit()
+                        return
+                    replay.processed += 1
+                    if not ok:
+                        replay.failed += 1
+                    advance()
+                replay.cursor = article_id
+                session.commit()
+            _sleep(replay.pause)
+    except Exception as e:
+        logging.error(f"Replay {replay_id} failed: {e}")
+        session.rollback()
+        replay = session.get(Replay, replay_id)
+        if replay is not None:
+            replay.state = FAILED
+            replay.error = str(e)[:2000]
+            session.commit()
+        raise
+    finally:
+        session.close()
+
+
+def start(replay_id: int) -> dict:
+    """Run a replay in the background; returns the job."""
+    return runner.submit("replay", lambda: run(replay_id), {"replay": replay_id}).to_dict()
+
+
+def set_state(session: Session, replay: Replay, state: str) -> None:
+    """Pause or cancel a replay; a running one stops before its next chunk."""
+    if replay.state in (COMPLETED, CANCELLED):
+        raise ValueError(f"replay {replay.id} is already {replay.state}")
+    replay.state = state
+    if state == CANCELLED:
+        replay.finished_at = datetime.now(timezone.utc)
+    session.commit()
+
+
+def resume_interrupted() -> None:
+    """Restart replays that were running when the service stopped (leader only)."""
+    if not coordination.is_leader():
+        return
+    session = SessionLocal()
+    try:
+        ids = [r[0] for r in session.query(Replay.id).filter(Replay.state == RUNNING).order_by(Replay.id)]
+    finally:
+        session.close()
+    for replay_id in ids:
+        logging.info(f"Resuming interrupted replay {replay_id}")
+        start(replay_id)
+
+
+def to_dict(replay: Replay) -> dict:
+    return {
+        "id": replay.id,
+        "feed_name": replay.feed_name,
+        "since": replay.since.isoformat() if replay.since else None,
+        "until": replay.until.isoformat() if replay.until else None,
+        "status": replay.status,
+        "summarize": replay.summarize,
+        "dispatch": replay.dispatch,
+        "users": replay.users,
+        "chunk_size": replay.chunk_size,
+        "pause": replay.pause,
+        "state": replay.state,
+        "cursor": replay.cursor,
+        "total": replay.total,
+        "processed": replay.processed,
+        "failed": replay.failed,
+        "skipped": replay.skipped,
+        "error": replay.error,
+        "created_at": replay.created_at.isoformat() if replay.created_at else None,
+        "finished_at": replay.finished_at.isoformat() if replay.finished_at else None,
+    }
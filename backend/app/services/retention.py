@@ -0,0 +1,165 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.article import Article, ArticleStatus
+from app.models.archive import ArchivedKey
+from app.services.tracing import span
+
+# Retention for the articles table: sent articles older than RETENTION_DAYS are
+# moved out of the hot table, either to gzipped JSON-lines files (one per
+# month) or, on Postgres, to a range-partitioned `articles_archive` table.
+# Their (feed_name, entry_id) keys are kept in `archived_keys` so they are
+# never re-ingested.
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", 0))  # 0 disables archival
+# 'jsonl' (compressed files in ARCHIVE_DIR) or 'partition' (Postgres archive table)
+ARCHIVE_MODE = os.getenv("ARCHIVE_MODE", "jsonl")
+# keep on persistent storage (docker-compose mounts the `archive_data` volume here)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "/data/archive")
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", 5000))
+
+ARCHIVE_TABLE = "articles_archive"
+
+
+def key_hash(feed_name: str, entry_id: str) -> int:
+    """Signed 64-bit hash of an article's dedup key."""
+    digest = hashlib.sha1(f"{feed_name}\0{entry_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def archived_entries(session: Session, feed_name: str, entry_ids: Iterable[str]) -> Set[str]:
+    """Return the subset of `entry_ids` of `feed_name` that were archived."""
+    by_hash = {key_hash(feed_name, e): e for e in entry_ids if e}
+    if not by_hash:
+        return set()
+    rows = session.query(ArchivedKey.key_hash).filter(ArchivedKey.key_hash.in_(list(by_hash))).all()
+    return {by_hash[r[0]] for r in rows}
+
+
+def _serialize(art: Article) -> dict:
+    return {
+        "feed_name": art.feed_name,
+        "entry_id": art.entry_id,
+        "title": art.title,
+        "link": art.link,
+        "published": art.published.isoformat() if art.published else None,
+        "summary": art.summary,
+        "ai_summary": art.ai_summary,
+        "recipients": art.recipients,
+        "cluster_id": art.cluster_id,
+        "status": art.status.value,
+        "created_at": art.created_at.isoformat() if art.created_at else None,
+        "updated_at": art.updated_at.isoformat() if art.updated_at else None,
+    }
+
+
+def _write_jsonl(batch: List[Article]) -> None:
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    by_month = {}
+    for art in batch:
+        by_month.setdefault(f"{art.created_at:%Y-%m}", []).append(art)
+    for month, arts in by_month.items():
+        path = os.path.join(ARCHIVE_DIR, f"articles-{month}.jsonl.gz")
+        # appending creates a new gzip member; readers decompress members transparently
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for art in arts:
+                f.write(json.dumps(_serialize(art)) + "\n")
+
+
+def ensure_archive_table(session: Session) -> None:
+    """Create the range-partitioned archive table (Postgres only)."""
+    session.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+            feed_name VARCHAR NOT NULL,
+            entry_id VARCHAR NOT NULL,
+            title VARCHAR,
+            link VARCHAR NOT NULL,
+            published TIMESTAMP,
+            summary TEXT,
+            ai_summary TEXT,
+            recipients TEXT,
+            cluster_id VARCHAR,
+            status VARCHAR NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL,
+            updated_at TIMESTAMPTZ
+        ) PARTITION BY RANGE (created_at)
+    """))
+
+
+def _ensure_partition(session: Session, month_start: datetime) -> None:
+    month_end = (month_start + timedelta(days=32)).replace(day=1)
+    name = f"{ARCHIVE_TABLE}_{month_start:%Y_%m}"
+    session.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {ARCHIVE_TABLE} "
+        f"FOR VALUES FROM ('{month_start:%Y-%m-%d}') TO ('{month_end:%Y-%m-%d}')"
+    ))
+
+
+def _write_partition(session: Session, batch: List[Article]) -> None:
+    months = {a.created_at.replace(day=1, hour=0, minute=0, second=0, microsecond=0) for a in batch}
+    for month in months:
+        _ensure_partition(session, month)
+    session.execute(
+        text(f"""
+            INSERT INTO {ARCHIVE_TABLE} (feed_name, entry_id, title, link, published, summary,
+                ai_summary, recipients, cluster_id, status, created_at, updated_at)
+            VALUES (:feed_name, :entry_id, :title, :link, :published, :summary,
+                :ai_summary, :recipients, :cluster_id, :status, :created_at, :updated_at)
+        """),
+        [{**_serialize(a), "recipients": json.dumps(a.recipients or [])} for a in batch],
+    )
+
+
+def archive_old_articles(session: Session, days: int = RETENTION_DAYS) -> int:
+    """Move sent articles older than `days` out of the hot table. Returns the count."""
+    if days <= 0:
+        return 0
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    if ARCHIVE_MODE == "partition":
+        ensure_archive_table(session)
+        session.commit()
+    total = 0
+    while True:
+        with span("db.archive_batch", mode=ARCHIVE_MODE) as sp:
+            batch = (
+                session.query(Article)
+                .options(selectinload(Article.body))
+                .filter(Article.status == ArticleStatus.sent, Article.created_at < cutoff)
+                .order_by(Article.created_at)
+                .limit(ARCHIVE_BATCH)
+                .all()
+            )
+            sp.set_attribute("rows", len(batch))
+            if not batch:
+                break
+            try:
+                if ARCHIVE_MODE == "partition":
+                    _write_partition(session, batch)
+                else:
+                    _write_jsonl(batch)
+                keys = {key_hash(a.feed_name, a.entry_id) for a in batch}
+                existing = {
+                    r[0] for r in session.query(ArchivedKey.key_hash).filter(ArchivedKey.key_hash.in_(list(keys)))
+                }
+                session.bulk_save_objects([ArchivedKey(key_hash=k) for k in keys - existing])
+                # article_bodies rows go with them (ON DELETE CASCADE)
+                session.query(Article).filter(Article.id.in_([a.id for a in batch])).delete(
+                    synchronize_session=False
+                )
+                session.commit()
+            except Exception as e:
+                logging.error(f"Error archiving articles: {e}")
+                session.rollback()
+                break
+        total += len(batch)
+    if total:
+        logging.info(f"Archived {total} articles older than {days} days ({ARCHIVE_MODE})")
+    return total
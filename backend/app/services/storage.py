@@ -0,0 +1,88 @@
+import logging
+
+from sqlalchemy import inspect, text
+
+from app.db import engine
+from app.models.article import ArticleBody
+from app.services.coordination import lock_key
+
+# Migration of the articles table to the compact layout:
+#  - a BIGINT identity `id` replaces the long `link` string as primary key
+#    (`link` stays unique), so claims, joins and index entries are 8 bytes,
+#  - summary / clean_summary / ai_summary move to `article_bodies`, one row
+#    per article, loaded lazily; Postgres compresses them (lz4 where the
+#    server supports it) and a low toast_tuple_target moves them out of line,
+#  - `recipients` / `delivered` become JSONB instead of JSON text.
+# Runs from init_db before create_all; every step checks the current schema,
+# so it is a no-op on new or already migrated databases.
+
+MIGRATION_LOCK = "rss_auto_reader:migrate_articles"
+BODY_COLUMNS = ("summary", "clean_summary", "ai_summary")
+
+
+def _columns(table: str) -> dict:
+    return {c["name"]: c for c in inspect(engine).get_columns(table)}
+
+
+def _compress_bodies(conn) -> None:
+    conn.execute(text("ALTER TABLE article_bodies SET (toast_tuple_target = 256)"))
+    for column in BODY_COLUMNS:
+        try:
+            with conn.begin_nested():
+                conn.execute(text(f"ALTER TABLE article_bodies ALTER COLUMN {column} SET COMPRESSION lz4"))
+        except Exception:
+            # Postgres < 14 or built without lz4: keep the default pglz compression
+            return
+
+
+def migrate_article_storage() -> bool:
+    """Bring an existing articles table to the compact layout. Returns True if anything changed."""
+    if not inspect(engine).has_table("articles"):
+        return False
+    columns = _columns("articles")
+    legacy_key = "id" not in columns
+    legacy_bodies = any(c in columns for c in BODY_COLUMNS)
+    text_lists = [c for c in ("recipients", "delivered") if c in columns and "JSON" not in str(columns[c]["type"])]
+    if not (legacy_key or legacy_bodies or text_lists):
+        return False
+
+    with engine.begin() as conn:
+        # one replica migrates, the others wait and then find nothing to do
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": lock_key(MIGRATION_LOCK)})
+        columns = _columns("articles")
+        if "id" not in columns:
+            logging.warning("Migrating articles: adding integer primary key")
+            conn.execute(text("ALTER TABLE articles ADD COLUMN id BIGINT GENERATED BY DEFAULT AS IDENTITY"))
+            pkey = inspect(conn).get_pk_constraint("articles").get("name") or "articles_pkey"
+            conn.execute(text(f'ALTER TABLE articles DROP CONSTRAINT "{pkey}"'))
+            conn.execute(text("ALTER TABLE articles ADD PRIMARY KEY (id)"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_articles_link"))
+            conn.execute(text("CREATE UNIQUE INDEX ix_articles_link ON articles (link)"))
+        moved = [c for c in BODY_COLUMNS if c in columns]
+        if moved:
+            logging.warning(f"Migrating articles: moving {', '.join(moved)} to article_bodies")
+            ArticleBody.__table__.create(conn, checkfirst=True)
+            _compress_bodies(conn)
+            values = ", ".join(moved)
+            conn.execute(text(f"""
+                INSERT INTO article_bodies (article_id, {values})
+                SELECT id, {values} FROM articles
+                WHERE {" OR ".join(f"{c} IS NOT NULL" for c in moved)}
+                ON CONFLICT (article_id) DO NOTHING
+            """))
+            for column in moved:
+                conn.execute(text(f"ALTER TABLE articles DROP COLUMN {column}"))
+        for column in text_lists:
+            logging.warning(f"Migrating articles: converting {column} to JSONB")
+            conn.execute(text(
+                f"ALTER TABLE articles ALTER COLUMN {column} TYPE JSONB "
+                f"USING NULLIF({column}, '')::jsonb"
+            ))
+    logging.warning("Article storage migrated; run VACUUM FULL articles to reclaim the space of dropped columns")
+    return True
+
+
+def ensure_body_compression() -> None:
+    """Apply compression settings to a freshly created article_bodies table."""
+    with engine.begin() as conn:
+        _compress_bodies(conn)
@@ -0,0 +1,118 @@
+import os
+import time
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.services import breaker
+from app.services.payload import WEBHOOK_MAX_CHARS, edit_message, post_message
+
+# Streaming summarization (llm.yml `streaming: true` or LLM_STREAMING=1). The
+# model answer is streamed with the recipients first; as soon as the recipient
+# list is complete, users with `early_notify` get a short "new article" message
+# while the summary is still being written. Users with `progressive_edits`
+# whose webhook returns a message id (see app.services.payload.post_message)
+# see that message edited every STREAM_EDIT_INTERVAL seconds as the summary
+# grows. When the summary is done it is delivered to the notified users right
+# away (replacing the early message where possible); other recipients keep
+# getting it from the regular dispatch run.
+
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", 2))
+
+# keys that follow the recipient list in StreamingSummarizationResult
+_AFTER_RECIPIENTS = ("Recommendation_reason", "Summary_of_article")
+
+
+def streaming_enabled() -> bool:
+    from app.core import load_llm_config
+
+    value = load_llm_config().get("streaming", os.getenv("LLM_STREAMING", "0"))
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def early_message(title: str, link: str, summary: str = "") -> str:
+    text = f"# New: [{title}]({link})\n"
+    return text + (summary if summary else "_Summary on its way..._")
+
+
+def _record_notified(article_id: int, name: str, message_id: Optional[str]) -> None:
+    """
+    Persist one notification right away, in its own transaction, so a failed
+    summarization (which rolls back the article) does not notify again on retry.
+    """
+    session = SessionLocal()
+    try:
+        session.execute(
+            text(
+                "UPDATE articles SET notified = COALESCE(notified, '{}'::jsonb) || jsonb_build_object(CAST(:name AS text), CAST(:mid AS text)) "
+                "WHERE id = :id"
+            ),
+            {"name": name, "mid": message_id, "id": article_id},
+        )
+        session.commit()
+    except Exception as e:
+        logging.warning(f"Could not record early notification of article {article_id} to {name}: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+class EarlyNotifier:
+    """Sends early notifications and progressive edits while one article's summary streams."""
+
+    def __init__(self, article_id: int, title: str, link: str, users: Dict[str, object], notified: Optional[dict] = None):
+        self.article_id = article_id
+        # opted-in users by name
+        self.users = users
+        self.title = title
+        self.link = link
+        # username -> message id (None when the target cannot be edited)
+        self.notified = dict(notified or {})
+        self._failed = set()
+        self._last_edit = 0.0
+        self._last_text = ""
+
+    def __call__(self, partial: dict) -> None:
+        if not self.users:
+            return
+        if any(k in partial for k in _AFTER_RECIPIENTS):
+            for name in partial.get("Recommend_recipients") or []:
+                if name in self.users and name not in self.notified and name not in self._failed:
+                    self._notify(name)
+        summary = partial.get("Summary_of_article") or ""
+        now = time.monotonic()
+        if summary and summary != self._last_text and now - self._last_edit >= STREAM_EDIT_INTERVAL:
+            self._last_edit = now
+            self._last_text = summary
+            self._edit_all(summary)
+
+    def _notify(self, name: str) -> None:
+        user = self.users[name]
+        try:
+            message_id = post_message(user.webhook, early_message(self.title, self.link), user=name, link=self.link)
+        except Exception as e:
+            logging.info(f"Early notification of {self.link} to {name} failed: {e}")
+            self._failed.add(name)
+            return
+        self.notified[name] = message_id if user.progressive_edits else None
+        _record_notified(self.article_id, name, self.notified[name])
+        logging.info(f"Sent early notification of {self.link} to {name}")
+
+    def _edit_all(self, summary: str) -> None:
+        for name, message_id in self.notified.items():
+            # notified on an earlier attempt but no longer opted in (or no longer a candidate)
+            user = self.users.get(name)
+            if not message_id or user is None:
+                continue
+            text = early_message(self.title, self.link, summary)
+            limit = user.max_payload_chars or WEBHOOK_MAX_CHARS
+            if len(text) > limit:
+                text = text[:max(0, limit - 3)] + "..."
+            try:
+                edit_message(user.webhook, message_id, text, user=name, link=self.link)
+            except breaker.CircuitOpen:
+                pass
+            except Exception as e:
+                logging.info(f"Progressive edit of {self.link} for {name} failed: {e}")
@@ -1,49 +1,47 @@
-import os
 import json
 from typing import List, Tuple, Dict
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
 import logging
 import yaml
 
 
 
 
-def summarize_article(
-    items: Tuple[str, str, str, str], users: List[Dict[str, List[str]]]
-) -> List[dict]:
-    """
-    Summarize multiple articles (title, link, published, feed_summary) and
-    select recipients based on user interests. Returns structured results.
-    """
-    from app.core import load_llm_config
+class SummarizationResult(BaseModel):
+    Summary_of_article: str = Field(default_factory=str, description="Concise summary of the article in Markdown format")
+    Recommendation_reason: str = Field(default_factory=str, description="Reason for recommending the article to users")
+    Recommend_recipients: List[str] = Field(default_factory=list, description="List of users who might interested in the article")
 
-    _llm_cfg = load_llm_config()
-    MODEL_NAME = _llm_cfg.get(
-        "model_name", os.getenv("MODEL_NAME", "gpt-4.1")
-    )
-    TEMPERATURE = float(
-        _llm_cfg.get("model_temperature", os.getenv("MODEL_TEMPERATURE", 0.5))
-    )
-    MAX_TOKENS = int(
-        _llm_cfg.get("model_max_tokens", os.getenv("MODEL_MAX_TOKENS", 4096))
-    )
-    OPENAI_API_BASE = _llm_cfg.get("openai_api_base") or os.getenv("OPENAI_API_BASE")
 
-    _llm_kwargs = {"model_name": MODEL_NAME, "temperature": TEMPERATURE}
-    if MAX_TOKENS:
-        _llm_kwargs["max_tokens"] = MAX_TOKENS
-    if OPENAI_API_BASE:
-        _llm_kwargs["openai_api_base"] = OPENAI_API_BASE
+class StreamingSummarizationResult(BaseModel):
+    """SummarizationResult with the recipients first, so they are known before the summary streams."""
+    Recommend_recipients: List[str] = Field(default_factory=list, description="List of users who might interested in the article")
+    Recommendation_reason: str = Field(default_factory=str, description="Reason for recommending the article to users")
+    Summary_of_article: str = Field(default_factory=str, description="Concise summary of the article in Markdown format")
+
 
-    LLM = ChatOpenAI(**_llm_kwargs)
+# Instructions for format
+SYSTEM_PROMPT = (
+    '''You are an assistant that summarizes news articles and recommends them to users by matching each article to their topics of interest. If no one is interested in the article, Summarize the article, make recipients a empty list.
+    For the article:
+    - Write a concise **summary in Markdown format**.
+    - **Include the article link**.
+    - Highlight key parts of the summary that match a user's interests using **bold text**. that you think why you recommend this article to the user.
+    - Provide a few takeaways related to users interest or key points from the article.'''
+        )
 
-    class SummarizationResult(BaseModel):
-        Summary_of_article: str = Field(default_factory=str, description="Concise summary of the article in Markdown format")
-        Recommendation_reason: str = Field(default_factory=str, description="Reason for recommending the article to users")
-        Recommend_recipients: List[str] = Field(default_factory=list, description="List of users who might interested in the article")
-    # print(f"Summarizing {len(items)} articles for {len(users)} users...")
+
+def article_input(art) -> Tuple[str, str, str, str]:
+    """(title, link, published, feed_summary) of an Article, as passed to the LLM."""
+    from app.services.content import prepare_article
+
+    return (art.title, art.link,
+        art.published.isoformat() if art.published else "",
+        prepare_article(art))
+
+
+def build_prompt(items: Tuple[str, str, str, str], users: List[Dict[str, List[str]]]) -> str:
+    """User prompt for one article (title, link, published, feed_summary)."""
     # Format user interests
     user_info = "\n".join(
         f"{u['username']}: \n\tUser's major or interest is areas about{', '.join(u['interests'])}" for u in users
@@ -53,30 +51,14 @@ def summarize_article(
     title, link, published, feed_summary = items
     article_line = f"Title: {title}\nLink: {link}\nPublished: {published}\nFeed Summary: {feed_summary}\n"
 
-    # Instructions for format
-    system_prompt = (
-        '''You are an assistant that summarizes news articles and recommends them to users by matching each article to their topics of interest. If no one is interested in the article, Summarize the article, make recipients a empty list.
-        For the article:
-        - Write a concise **summary in Markdown format**.
-        - **Include the article link**.
-        - Highlight key parts of the summary that match a user's interests using **bold text**. that you think why you recommend this article to the user.
-        - Provide a few takeaways related to users interest or key points from the article.'''
-            )
-
-    full_prompt = (
+    return (
         f"Users and their interests:\n{user_info}\n\n"
         f"Article to summarize:\n{article_line}\n\n"
     )
-    
-    llm = LLM.with_structured_output(SummarizationResult)
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=full_prompt)
-    ]
 
-    response = llm.invoke(messages)    
-    # print(f"LLM response: {response}")
-    # Try parsing using the parser
+
+def check_result(response: SummarizationResult) -> dict:
+    """Validate a model answer and return it as a dict."""
     if response.Summary_of_article is None or response.Summary_of_article.strip() == "":
         raise ValueError("LLM did not return a valid summary. Please check the input data and model configuration.")
     try:
@@ -85,3 +67,51 @@ def summarize_article(
     except Exception as e:
         raise ValueError(f"Model returned invalid structured output:\n{response}\n\nError: {e}")
 
+
+def summarize_article(
+    items: Tuple[str, str, str, str], users: List[Dict[str, List[str]]]
+) -> List[dict]:
+    """
+    Summarize multiple articles (title, link, published, feed_summary) and
+    select recipients based on user interests. Returns structured results.
+    """
+    # langchain is heavy; import it on first use rather than at API startup
+    from langchain_core.messages import SystemMessage, HumanMessage
+    from app.services import llm_router
+    from app.services.content import count_tokens
+
+    full_prompt = build_prompt(items, users)
+    messages = [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=full_prompt)
+    ]
+
+    # picks the endpoint by input size and observed latency/errors, with failover
+    response = llm_router.invoke(messages, structured=SummarizationResult, input_tokens=count_tokens(full_prompt))
+    # print(f"LLM response: {response}")
+    return check_result(response)
+
+
+def summarize_article_stream(
+    items: Tuple[str, str, str, str], users: List[Dict[str, List[str]]], on_partial
+) -> dict:
+    """
+    Like summarize_article, but streams the answer: `on_partial(dict)` is
+    called with each partial result (recipients first, then the growing summary).
+    """
+    from langchain_core.messages import SystemMessage, HumanMessage
+    from app.services import llm_router
+    from app.services.content import count_tokens
+
+    full_prompt = build_prompt(items, users)
+    messages = [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=full_prompt)
+    ]
+    schema = StreamingSummarizationResult.model_json_schema()
+    final = {}
+    for partial in llm_router.stream(messages, schema=schema, input_tokens=count_tokens(full_prompt)):
+        if isinstance(partial, dict):
+            final = partial
+            on_partial(partial)
+    return check_result(StreamingSummarizationResult.model_validate(final))
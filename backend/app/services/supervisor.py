@@ -0,0 +1,112 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Awaitable, Callable, Dict
+
+# Supervision of the background loops: crashed loops are restarted with
+# exponential backoff, and on shutdown the loops are asked to stop, given
+# SHUTDOWN_TIMEOUT seconds to finish the item they are working on, then
+# cancelled. Job code running in worker threads polls `stopping()` between
+# work items (feeds, articles, deliveries) so in-flight work drains quickly;
+# progress is committed per item, so nothing finished is redone on restart.
+
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", 30))
+RESTART_BACKOFF_INITIAL = float(os.getenv("RESTART_BACKOFF_INITIAL", 1))
+RESTART_BACKOFF_MAX = float(os.getenv("RESTART_BACKOFF_MAX", 300))
+# a loop that ran this long before crashing restarts with the initial backoff
+RESTART_RESET_AFTER = float(os.getenv("RESTART_RESET_AFTER", 600))
+
+# set on shutdown; checked by synchronous job code running in threads
+_stop = threading.Event()
+
+
+def stopping() -> bool:
+    """True once shutdown has begun; jobs should stop taking new work."""
+    return _stop.is_set()
+
+
+class TaskSupervisor:
+    """Tracks named background loops, restarts them on crash and drains them on shutdown."""
+
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.info: Dict[str, dict] = {}
+        self._stop_async: asyncio.Event | None = None
+
+    def _stop_event(self) -> asyncio.Event:
+        if self._stop_async is None:
+            self._stop_async = asyncio.Event()
+            if _stop.is_set():
+                self._stop_async.set()
+        return self._stop_async
+
+    def start(self, name: str, factory: Callable[[], Awaitable[None]]) -> None:
+        """Run `factory()` as a supervised task named `name`."""
+        if name in self.tasks and not self.tasks[name].done():
+            return
+        self.info[name] = {"state": "running", "restarts": 0, "last_error": None, "started_at": datetime.utcnow()}
+        self.tasks[name] = asyncio.create_task(self._supervise(name, factory), name=name)
+
+    async def _supervise(self, name: str, factory: Callable[[], Awaitable[None]]) -> None:
+        delay = RESTART_BACKOFF_INITIAL
+        info = self.info[name]
+        while not stopping():
+            started = time.monotonic()
+            try:
+                await factory()
+                info["state"] = "finished"
+                return
+            except asyncio.CancelledError:
+                info["state"] = "cancelled"
+                raise
+            except Exception as e:
+                if time.monotonic() - started > RESTART_RESET_AFTER:
+                    delay = RESTART_BACKOFF_INITIAL
+                info["restarts"] += 1
+                info["last_error"] = f"{type(e).__name__}: {e}"
+                info["state"] = "backoff"
+                logging.exception(f"Background loop '{name}' crashed; restarting in {delay:.0f}s")
+                if await self.wait(delay):
+                    break
+                info["state"] = "running"
+                info["started_at"] = datetime.utcnow()
+                delay = min(delay * 2, RESTART_BACKOFF_MAX)
+        info["state"] = "stopped"
+
+    async def wait(self, seconds: float) -> bool:
+        """Sleep up to `seconds`; return True early if shutdown began."""
+        try:
+            await asyncio.wait_for(self._stop_event().wait(), timeout=max(0, seconds))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Signal all loops to stop, wait up to `timeout` seconds, then cancel the rest."""
+        _stop.set()
+        self._stop_event().set()
+        pending = [t for t in self.tasks.values() if not t.done()]
+        if not pending:
+            return
+        logging.info(f"Draining {len(pending)} background loops (deadline {timeout:.0f}s)")
+        done, pending = await asyncio.wait(pending, timeout=timeout)
+        for task in pending:
+            logging.warning(f"Background loop '{task.get_name()}' did not stop within {timeout:.0f}s; cancelling")
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {
+                **{k: v.isoformat() if isinstance(v, datetime) else v for k, v in info.items()},
+                "alive": not self.tasks[name].done(),
+            }
+            for name, info in self.info.items()
+        }
+
+
+supervisor = TaskSupervisor()
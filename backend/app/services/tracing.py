@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Span-style instrumentation for the poll/summarize/dispatch pipeline.
+# Tracing is a no-op unless enabled (env or PUT /api/tracing). Spans go to an
+# in-memory ring buffer, optionally appended to a JSON-lines file, or are
+# forwarded to OpenTelemetry when the `opentelemetry` package is installed.
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+# exporter: 'memory', 'json' (memory + JSON-lines file) or 'otel'
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "memory")
+TRACING_JSON_PATH = os.getenv("TRACING_JSON_PATH", "/tmp/rss_spans.jsonl")
+TRACING_BUFFER_SIZE = int(os.getenv("TRACING_BUFFER_SIZE", 2000))
+
+# jobs running longer than this many seconds dump a sampled profile (0 disables)
+PROFILE_THRESHOLD = float(os.getenv("PROFILE_THRESHOLD", 0))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.01))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/rss_profiles")
+
+_settings = {
+    "enabled": TRACING_ENABLED,
+    "exporter": TRACING_EXPORTER,
+    "profile_threshold": PROFILE_THRESHOLD,
+}
+_spans: deque = deque(maxlen=TRACING_BUFFER_SIZE)
+_lock = threading.Lock()
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_span_ids = iter(range(1, sys.maxsize))
+
+
+class Span:
+    """A single timed operation with attributes and an optional parent."""
+
+    def __init__(self, name: str, attributes: Dict, parent: Optional["Span"] = None):
+        self.span_id = next(_span_ids)
+        self.name = name
+        self.attributes = dict(attributes)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.utcfromtimestamp(self.start).isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled; accepts and discards attributes."""
+
+    def set_attribute(self, key: str, value) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _export(span: Span) -> None:
+    record = span.to_dict()
+    with _lock:
+        _spans.append(record)
+        if _settings["exporter"] == "json":
+            try:
+                with open(TRACING_JSON_PATH, "a") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+            except OSError as e:
+                logging.warning(f"Could not write span to {TRACING_JSON_PATH}: {e}")
+
+
+def _otel_tracer():
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return None
+    return trace.get_tracer("rss_auto_reader")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time the wrapped block as a span named `name`."""
+    if not _settings["enabled"]:
+        yield _NOOP_SPAN
+        return
+    if _settings["exporter"] == "otel":
+        tracer = _otel_tracer()
+        if tracer is not None:
+            with tracer.start_as_current_span(name, attributes=attributes) as otel_span:
+                yield otel_span
+            return
+    current = Span(name, attributes, parent=_current_span.get())
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end = time.time()
+        _current_span.reset(token)
+        _export(current)
+
+
+def recent_spans(limit: int = 200, name: Optional[str] = None) -> List[dict]:
+    """Return the most recent finished spans, newest first."""
+    with _lock:
+        records = list(_spans)
+    if name:
+        records = [r for r in records if r["name"].startswith(name)]
+    return records[::-1][:limit]
+
+
+def get_settings() -> dict:
+    return dict(_settings)
+
+
+def configure(
+    enabled: Optional[bool] = None,
+    exporter: Optional[str] = None,
+    profile_threshold: Optional[float] = None,
+) -> dict:
+    """Update tracing settings at runtime and return the new settings."""
+    if exporter is not None and exporter not in ("memory", "json", "otel"):
+        raise ValueError(f"Unknown tracing exporter '{exporter}'")
+    if enabled is not None:
+        _settings["enabled"] = enabled
+    if exporter is not None:
+        _settings["exporter"] = exporter
+    if profile_threshold is not None:
+        _settings["profile_threshold"] = max(0.0, float(profile_threshold))
+    return get_settings()
+
+
+class SamplingProfiler(threading.Thread):
+    """Periodically samples the stack of one thread and counts collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def dump(self, path: str) -> None:
+        """Write samples in collapsed-stack format (flamegraph.pl / speedscope)."""
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_job(name: str):
+    """Sample the wrapped job and dump a profile if it exceeds the threshold."""
+    threshold = _settings["profile_threshold"]
+    if not threshold:
+        yield
+        return
+    profiler = SamplingProfiler(threading.get_ident())
+    profiler.start()
+    start = time.time()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        elapsed = time.time() - start
+        if elapsed > threshold:
+            path = os.path.join(PROFILE_DIR, f"{name}-{datetime.utcnow():%Y%m%dT%H%M%S}.folded")
+            try:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                profiler.dump(path)
+                logging.warning(f"Job '{name}' took {elapsed:.1f}s (threshold {threshold}s); profile written to {path}")
+            except OSError as e:
+                logging.error(f"Could not write profile for job '{name}': {e}")
@@ -3,31 +3,30 @@ import asyncio
 from fastapi import FastAPI
 
 from app.api.views import router as api_router
-from app.core import (
-    _initial_seed,
-    _initial_fetch,
-    poll_loop,
-    summarize_loop,
-    dispatch_loop,
-    plugin_loop,
-)
-from app.db import init_db
+from app.core import startup_tasks
+from app.services.supervisor import supervisor, SHUTDOWN_TIMEOUT
+from app.services import coordination, replay
+from app.services.jobs import jobs
 
 
 # using lifespane events to manage startup and shutdown tasks
 # This allows us to run async functions during startup and shutdown
 
 async def lifespan(app: FastAPI):
-    await asyncio.to_thread(init_db)
-    await asyncio.to_thread(_initial_seed)
-    await asyncio.to_thread(_initial_fetch)
-    asyncio.create_task(poll_loop())
-    asyncio.create_task(summarize_loop())
-    asyncio.create_task(dispatch_loop())
-    asyncio.create_task(plugin_loop())
-    
+    # DB init, seeding and the initial fetch run in the background so the API
+    # is listening right away; /api/health/ready reports when they are done.
+    app.state.startup_task = asyncio.create_task(startup_tasks())
+
     yield  # This will keep the app running until shutdown
 
+    # stop the loops, let in-flight items finish within the deadline
+    app.state.startup_task.cancel()
+    await supervisor.shutdown(SHUTDOWN_TIMEOUT)
+    jobs.shutdown()
+    replay.runner.shutdown()
+    # hand this worker's feeds and leadership to the remaining replicas
+    await asyncio.to_thread(coordination.deregister)
+
 app = FastAPI(lifespan=lifespan)
 app.include_router(api_router, prefix="/api")
 
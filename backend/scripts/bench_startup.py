@@ -0,0 +1,80 @@
+"""
+Measure backend startup time.
+
+Starts `uvicorn main:app` in a subprocess and reports how long it takes until
+/api/health/live answers (API listening) and until /api/health/ready returns
+200 (database initialized and seeded). Also prints the slowest imports of
+`main` from `python -X importtime`.
+
+    DATABASE_URL=postgresql://... python scripts/bench_startup.py --port 8099
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for(url: str, start: float, timeout: float, expect_ok: bool = True) -> float:
+    while time.perf_counter() - start < timeout:
+        try:
+            resp = requests.get(url, timeout=1)
+            if not expect_ok or resp.ok:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def slowest_imports(count: int = 15) -> None:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), name.strip()))
+    print("\nSlowest imports of main (cumulative):")
+    for cumulative_us, name in sorted(rows, reverse=True)[:count]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}/api"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        live = wait_for(f"{base}/health/live", start, args.timeout)
+        print(f"live  (API listening):        {live:6.2f}s")
+        ready = wait_for(f"{base}/health/ready", start, args.timeout)
+        print(f"ready (DB initialized/seeded): {ready:6.2f}s")
+        state = requests.get(f"{base}/health/ready", timeout=1).json()
+        print(f"startup phase: {state['phase']} ({state['feeds_done']}/{state['feeds_total']} feeds fetched)")
+    finally:
+        proc.terminate()
+        proc.wait()
+    slowest_imports()
+
+
+if __name__ == "__main__":
+    main()
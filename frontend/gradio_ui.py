@@ -1,50 +1,64 @@
 import os
-import requests
+import math
+import httpx
 import gradio as gr
 
 API_BASE = os.getenv("API_BASE", "http://127.0.0.1:8000/api")
+# articles per page in the Articles table
+PAGE_SIZE = int(os.getenv("UI_PAGE_SIZE", 50))
+# seconds between job status polls
+JOB_POLL_INTERVAL = float(os.getenv("UI_JOB_POLL_INTERVAL", 2))
 
-def get_feeds_table():
-    resp = requests.get(f"{API_BASE}/feeds")
-    resp.raise_for_status()
-    return [[f['name'], f['url']] for f in resp.json()]
+# one pooled async client for all handlers (keep-alive connections to the API)
+client = httpx.AsyncClient(
+    base_url=API_BASE,
+    timeout=httpx.Timeout(30.0),
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
 
-def add_feed(name: str, url: str):
-    resp = requests.post(
-        f"{API_BASE}/feeds",
-        json={"name": name, "url": url},
-    )
-    resp.raise_for_status()
-    return "", "", get_feeds_table()
+STATUS_CHOICES = ["all", "new", "summarized", "sent"]
 
-def delete_feed(name: str):
-    resp = requests.delete(f"{API_BASE}/feeds/{name}")
+async def _get(path: str, **params):
+    resp = await client.get(path, params={k: v for k, v in params.items() if v not in (None, "")})
     resp.raise_for_status()
-    return get_feeds_table()
+    return resp
+
+async def get_feeds_table():
+    resp = await _get("/feeds")
+    return [[f['name'], f['url'], f.get('priority', 0)] for f in resp.json()]
 
-def get_users_table():
-    resp = requests.get(f"{API_BASE}/users")
+async def add_feed(name: str, url: str, priority: float):
+    resp = await client.post("/feeds", json={"name": name, "url": url, "priority": int(priority or 0)})
     resp.raise_for_status()
+    return "", "", 0, await get_feeds_table()
+
+async def delete_feed(name: str):
+    if name:
+        resp = await client.delete(f"/feeds/{name}")
+        resp.raise_for_status()
+    return await get_feeds_table()
+
+async def get_users_table():
+    resp = await _get("/users")
     return [[u['username'], u['webhook'], ", ".join(u.get('interests', []))] for u in resp.json()]
 
-def add_user(username: str, webhook: str, interests: str):
+async def add_user(username: str, webhook: str, interests: str):
     items = [it.strip() for it in interests.split(',') if it.strip()]
-    resp = requests.post(
-        f"{API_BASE}/users",
+    resp = await client.post(
+        "/users",
         json={"username": username, "webhook": webhook, "interests": items},
     )
     resp.raise_for_status()
-    return "", "", "", get_users_table()
+    return "", "", "", await get_users_table()
 
-def delete_user(username: str):
-    resp = requests.delete(f"{API_BASE}/users/{username}")
-    resp.raise_for_status()
-    return get_users_table()
+async def delete_user(username: str):
+    if username:
+        resp = await client.delete(f"/users/{username}")
+        resp.raise_for_status()
+    return await get_users_table()
 
-def get_llm_settings():
-    resp = requests.get(f"{API_BASE}/llm-config")
-    resp.raise_for_status()
-    cfg = resp.json()
+async def get_llm_settings():
+    cfg = (await _get("/llm-config")).json()
     return (
         cfg.get("model_name", ""),
         str(cfg.get("model_temperature", "")),
@@ -52,75 +66,156 @@ def get_llm_settings():
         cfg.get("openai_api_base", ""),
     )
 
-def save_llm_settings(model_name: str, temperature: str, max_tokens: str, openai_api_base: str):
+async def save_llm_settings(model_name: str, temperature: str, max_tokens: str, openai_api_base: str):
     payload = {
         "model_name": model_name,
         "model_temperature": float(temperature) if temperature else 0.0,
         "model_max_tokens": int(max_tokens) if max_tokens else 0,
         "openai_api_base": openai_api_base,
     }
-    resp = requests.put(f"{API_BASE}/llm-config", json=payload)
+    resp = await client.put("/llm-config", json=payload)
     resp.raise_for_status()
-    return get_llm_settings()
+    return await get_llm_settings()
 
-def get_articles_table():
-    resp = requests.get(f"{API_BASE}/articles")
-    resp.raise_for_status()
-    data = resp.json()
-    return [
+async def get_articles_page(page: int, status: str, feed: str, search: str):
+    """One page of articles (brief rows) plus a 'page x of y' label."""
+    page = max(1, int(page or 1))
+    resp = await _get(
+        "/articles",
+        limit=PAGE_SIZE,
+        offset=(page - 1) * PAGE_SIZE,
+        status=None if status == "all" else status,
+        feed=feed.strip() if feed else None,
+        q=search.strip() if search else None,
+        brief="true",
+        count="true",
+    )
+    total = int(resp.headers.get("X-Total-Count", 0))
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    rows = [
         [
-            art.get('id'),
             art.get('feed_name'),
             art.get('title'),
             art.get('link'),
             art.get('published') or "",
-            art.get('summary') or "",
             art.get('ai_summary') or "",
             ", ".join(art.get('recipients', [])),
             art.get('sent'),
             art.get('status'),
-            art.get('created_at'),
             art.get('updated_at') or "",
         ]
-        for art in data
+        for art in resp.json()
     ]
+    return rows, f"Page {page} of {pages} ({total} articles)", page
+
+async def _page(page: int, step: int, *filters):
+    return await get_articles_page(max(1, int(page or 1) + step), *filters)
 
-def manual_fetch_and_summarize():
-    resp = requests.post(f"{API_BASE}/fetch")
+async def prev_page(page, *filters):
+    return await _page(page, -1, *filters)
+
+async def next_page(page, *filters):
+    return await _page(page, 1, *filters)
+
+def _job_label(job: dict) -> str:
+    progress = ", ".join(f"{k}: {v}" for k, v in job.get("progress", {}).items())
+    label = f"**{job['kind']}** job `{job['id']}`: {job['state']}"
+    if progress:
+        label += f" ({progress})"
+    if job.get("error"):
+        label += f"\n\nError: {job['error']}"
+    return label
+
+async def _start_job(path: str):
+    resp = await client.post(path)
     resp.raise_for_status()
-    return get_articles_table()
+    job = resp.json()
+    return job["id"], _job_label(job), gr.Timer(active=True)
+
+async def manual_fetch_and_summarize():
+    return await _start_job("/fetch")
 
-def manual_dispatch():
-    resp = requests.post(f"{API_BASE}/dispatch")
+async def manual_dispatch():
+    return await _start_job("/dispatch")
+
+async def poll_job(job_id: str):
+    """Refresh the job status; stop polling once the job has finished."""
+    if not job_id:
+        return "", gr.Timer(active=False)
+    resp = await client.get(f"/jobs/{job_id}")
+    if resp.status_code == 404:
+        return "", gr.Timer(active=False)
     resp.raise_for_status()
-    return get_articles_table()
+    job = resp.json()
+    active = job["state"] in ("queued", "running")
+    return _job_label(job), gr.Timer(active=active)
+
+async def get_degraded_endpoints():
+    resp = await _get("/health/endpoints", degraded="true")
+    return [
+        [
+            e['key'],
+            e['state'],
+            round(e['score'], 2),
+            e['consecutive_failures'],
+            e.get('open_until') or "",
+            e.get('last_error') or "",
+        ]
+        for e in resp.json()
+    ]
+
+async def reset_endpoint(key: str):
+    if key:
+        resp = await client.post(f"/health/endpoints/{key}/reset")
+        resp.raise_for_status()
+    return "", await get_degraded_endpoints()
 
 def build_interface():
     with gr.Blocks(css="frontend/style.css") as demo:
         gr.Markdown("# Admin UI: Articles, Feeds & Webhooks")
 
         gr.Markdown("## Articles")
+        with gr.Row():
+            status_in = gr.Dropdown(STATUS_CHOICES, value="all", label="Status")
+            feed_in = gr.Textbox(label="Feed")
+            search_in = gr.Textbox(label="Title contains")
+        filters = [status_in, feed_in, search_in]
         art_table = gr.Dataframe(
             headers=[
-                "ID", "Feed", "Title", "Link", "Published",
-                "Feed Summary", "AI Summary", "Recipients",
-                "Sent", "Status", "Created", "Updated"
+                "Feed", "Title", "Link", "Published", "AI Summary",
+                "Recipients", "Sent", "Status", "Updated"
             ],
             interactive=False,
         )
+        page = gr.State(1)
+        page_label = gr.Markdown()
+        page_outputs = [art_table, page_label, page]
         with gr.Row():
-            gr.Button("Refresh Articles").click(get_articles_table, None, art_table)
-            gr.Button("Fetch & Summarize Now").click(manual_fetch_and_summarize, None, art_table)
-            gr.Button("Dispatch Pending").click(manual_dispatch, None, art_table)
+            gr.Button("Previous").click(prev_page, [page, *filters], page_outputs)
+            gr.Button("Refresh Articles").click(get_articles_page, [page, *filters], page_outputs)
+            gr.Button("Next").click(next_page, [page, *filters], page_outputs)
+        # a new filter starts again from the first page
+        for f in filters:
+            f.submit(get_articles_page, [gr.State(1), *filters], page_outputs)
+        status_in.change(get_articles_page, [gr.State(1), *filters], page_outputs)
+
+        job_id = gr.State("")
+        job_label = gr.Markdown()
+        job_timer = gr.Timer(JOB_POLL_INTERVAL, active=False)
+        job_timer.tick(poll_job, job_id, [job_label, job_timer])
+        with gr.Row():
+            gr.Button("Fetch & Summarize Now").click(manual_fetch_and_summarize, None, [job_id, job_label, job_timer])
+            gr.Button("Dispatch Pending").click(manual_dispatch, None, [job_id, job_label, job_timer])
 
         gr.Markdown("## Feeds")
-        feed_table = gr.Dataframe(headers=["Name", "URL"], interactive=False)
+        feed_table = gr.Dataframe(headers=["Name", "URL", "Priority"], interactive=False)
         with gr.Row():
             name_in = gr.Textbox(label="Name")
             url_in = gr.Textbox(label="URL")
-            gr.Button("Add Feed").click(add_feed, [name_in, url_in], [name_in, url_in, feed_table])
+            prio_in = gr.Number(label="Priority (>0 urgent, <0 backfill)", value=0, precision=0)
+            gr.Button("Add Feed").click(add_feed, [name_in, url_in, prio_in], [name_in, url_in, prio_in, feed_table])
         del_feed = gr.Textbox(label="Delete Feed by Name")
-        del_feed.change(delete_feed, del_feed, feed_table)
+        del_feed.submit(delete_feed, del_feed, feed_table)
         gr.Button("Refresh Feeds").click(get_feeds_table, None, feed_table)
 
         gr.Markdown("## Users / Webhooks")
@@ -131,9 +226,19 @@ def build_interface():
             intr = gr.Textbox(label="Interests (comma-separated)")
             gr.Button("Add User").click(add_user, [uname, hook, intr], [uname, hook, intr, user_table])
         del_user = gr.Textbox(label="Delete User by Username")
-        del_user.change(delete_user, del_user, user_table)
+        del_user.submit(delete_user, del_user, user_table)
         gr.Button("Refresh Users").click(get_users_table, None, user_table)
 
+        gr.Markdown("## Degraded Endpoints")
+        health_table = gr.Dataframe(
+            headers=["Endpoint", "State", "Score", "Failures", "Open Until", "Last Error"],
+            interactive=False,
+        )
+        with gr.Row():
+            reset_key = gr.Textbox(label="Reset Endpoint by Key")
+            gr.Button("Reset").click(reset_endpoint, reset_key, [reset_key, health_table])
+        gr.Button("Refresh Endpoints").click(get_degraded_endpoints, None, health_table)
+
         gr.Markdown("## LLM Settings")
         llm_model = gr.Textbox(label="Model Name")
         llm_temp = gr.Textbox(label="Temperature")
@@ -151,6 +256,9 @@ def build_interface():
                 [llm_model, llm_temp, llm_max, llm_base],
             )
 
+        # first page only; the other tables load on demand
+        demo.load(get_articles_page, [page, *filters], page_outputs)
+
     return demo
 
-gr_interface = build_interface()
\ No newline at end of file
+gr_interface = build_interface()